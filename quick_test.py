@@ -2,10 +2,14 @@
 """
 快速测试脚本 - 用于快速测试视频重命名工具功能
 """
-import subprocess
+import asyncio
+import logging
 import sys
 from pathlib import Path
 
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent))
+
 def run_test():
     """运行快速测试"""
     print("[TEST] 启动视频重命名工具快速测试...")
@@ -24,25 +28,26 @@ def run_test():
     print("[INFO] 模式: 试运行 + 交互模式")
     print("=" * 50)
 
-    # 构建命令
-    cmd = [
-        sys.executable, "scripts/run_renamer.py",
-        target_dir,
-        "--dry-run",      # 试运行模式
-        "--interactive",  # 交互模式
-        "--verbose",      # 详细输出
-        "--workers", "1"  # 单线程处理，便于观察
-    ]
-
     try:
-        # 运行命令
+        # 在当前进程内运行，避免再启动一个Python解释器
+        from scripts.run_renamer import VideoRenamerApp
+
+        logging.getLogger().setLevel(logging.DEBUG)  # 详细输出
+
+        app = VideoRenamerApp(
+            target_dir,
+            dry_run=True,      # 试运行模式
+            interactive=True,  # 交互模式
+            workers=1          # 单线程处理，便于观察
+        )
+
         print("[START] 开始执行...")
-        result = subprocess.run(cmd, cwd=Path(__file__).parent)
+        result = asyncio.run(app.run())
 
-        if result.returncode == 0:
+        if result["status"] == "success":
             print("\n[SUCCESS] 测试运行完成！")
         else:
-            print(f"\n[FAILED] 运行失败，退出码: {result.returncode}")
+            print(f"\n[FAILED] 运行失败: {result['message']}")
 
     except KeyboardInterrupt:
         print("\n[STOP] 用户中断")
@@ -6,9 +6,10 @@ python scripts/run_renamer.py /path/to/video/files [options]
 """
 import asyncio
 import logging
+import logging.handlers
 import sys
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import click
 from tqdm import tqdm
 
@@ -18,15 +19,20 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.core.file_scanner import FileScanner
 from src.core.video_processor import VideoProcessor
 from src.core.ai_analyzer import AIAnalyzer
+from src.core.ai_cache import AICache
 from src.core.file_renamer import FileRenamer
 from src.config.settings import settings
 
-# 配置日志
+# 配置日志（文件日志先在内存中缓冲再批量写入，ERROR及以上立即落盘）
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+file_handler = logging.FileHandler('video_renamer.log', encoding='utf-8')
+file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
 logging.basicConfig(
     level=getattr(logging, settings.log_level),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler('video_renamer.log', encoding='utf-8'),
+        logging.handlers.MemoryHandler(capacity=256, flushLevel=logging.ERROR, target=file_handler),
         logging.StreamHandler()
     ]
 )
@@ -36,10 +42,11 @@ logger = logging.getLogger(__name__)
 class VideoRenamerApp:
     """视频重命名应用主类"""
 
-    def __init__(self, target_directory: str, dry_run: bool = False, interactive: bool = False):
+    def __init__(self, target_directory: str, dry_run: bool = False, interactive: bool = False, workers: int = None):
         self.target_directory = Path(target_directory)
         self.dry_run = dry_run
         self.interactive = interactive
+        self.workers = workers or settings.max_workers
 
         # 初始化各个组件
         self.scanner = FileScanner(target_directory)
@@ -78,20 +85,11 @@ class VideoRenamerApp:
 
             logger.info("API连接测试成功")
 
-            # 3. 处理每个文件
-            rename_map = {}
-
-            for video_path in tqdm(garbled_files, desc="处理视频文件"):
-                try:
-                    result = await self.process_single_video(video_path)
-                    if result:
-                        rename_map[video_path] = result
-
-                except Exception as e:
-                    error_msg = f"处理文件失败 {video_path.name}: {e}"
-                    logger.error(error_msg)
-                    self.stats["errors"].append(error_msg)
-                    self.stats["failed_files"] += 1
+            # 3. 处理每个文件（交互模式需要逐个确认，保持串行）
+            if self.interactive:
+                rename_map = await self.process_videos_serially(garbled_files)
+            else:
+                rename_map = await self.process_videos_concurrently(garbled_files)
 
             # 4. 执行重命名
             if rename_map:
@@ -127,9 +125,91 @@ class VideoRenamerApp:
                 "statistics": self.stats
             }
 
+        finally:
+            await self.ai_analyzer.aclose()
+
+    async def process_videos_serially(self, video_files: List[Path]) -> Dict[Path, str]:
+        """逐个处理视频文件"""
+        rename_map = {}
+
+        for video_path in tqdm(video_files, desc="处理视频文件", mininterval=0.5):
+            try:
+                result = await self.process_single_video(video_path)
+                if result:
+                    rename_map[video_path] = result
+
+            except Exception as e:
+                self._record_failure(video_path, e)
+
+        return rename_map
+
+    async def process_videos_concurrently(self, video_files: List[Path]) -> Dict[Path, str]:
+        """
+        并发处理视频文件
+        每个任务依次完成单个视频的截图与分析，
+        多个任务之间截图解码与API等待相互重叠
+        """
+        rename_map = {}
+        pending_videos = iter(video_files)
+        progress = tqdm(total=len(video_files), desc="处理视频文件", mininterval=0.5)
+
+        async def worker():
+            for video_path in pending_videos:
+                try:
+                    filename = await self.analyze_video(video_path)
+                    if filename:
+                        rename_map[video_path] = filename
+                except Exception as e:
+                    self._record_failure(video_path, e)
+                finally:
+                    progress.update(1)
+
+        await asyncio.gather(*(worker() for _ in range(self.workers)))
+
+        progress.close()
+        return rename_map
+
+    async def analyze_video(self, video_path: Path) -> Optional[str]:
+        """
+        提取截图、计算摘要、AI分析在同一协程中完成
+        截图只在内存中经过一次，每帧解码后立即计算摘要
+        """
+        screenshots = []
+        image_keys = []
+
+        async for jpeg_data in self.video_processor.stream_key_frames(video_path):
+            screenshots.append(jpeg_data)
+            image_keys.append(AICache.image_key(jpeg_data))
+
+        if not screenshots:
+            logger.warning(f"无法提取截图: {video_path.name}")
+            return None
+
+        # 以全部截图摘要查询视频级缓存，未命中时合并为一次请求
+        return await self.suggest_filename(video_path, screenshots, image_keys)
+
+    async def suggest_filename(self, video_path: Path, screenshots: List[bytes], image_keys: List[str] = None) -> str:
+        """AI分析截图生成文件名，失败时使用备用文件名"""
+        filename = await self.ai_analyzer.analyze_video_screenshots(
+            video_path, screenshots, image_keys
+        )
+
+        if not filename:
+            filename = self.ai_analyzer.generate_fallback_filename(video_path)
+            logger.warning(f"使用备用文件名: {video_path.name} -> {filename}")
+
+        return filename
+
+    def _record_failure(self, video_path: Path, error: Exception):
+        """记录单个文件的处理失败"""
+        error_msg = f"处理文件失败 {video_path.name}: {error}"
+        logger.error(error_msg)
+        self.stats["errors"].append(error_msg)
+        self.stats["failed_files"] += 1
+
     async def process_single_video(self, video_path: Path) -> str:
         """处理单个视频文件"""
-        logger.debug(f"开始处理: {video_path.name}")
+        logger.debug("开始处理: %s", video_path.name)
 
         # 交互模式确认
         if self.interactive:
@@ -141,27 +221,14 @@ class VideoRenamerApp:
                 click.echo("[SKIP] 跳过此文件")
                 return None
 
-        # 1. 提取视频截图
-        click.echo("[SCREENSHOT] 正在提取视频截图...")
-        screenshot_paths = self.video_processor.extract_key_frames(video_path)
-        if not screenshot_paths:
-            logger.warning(f"无法提取截图: {video_path.name}")
-            return None
-
-        click.echo(f"[INFO] 成功提取 {len(screenshot_paths)} 张截图")
-
-        # 2. AI分析截图
-        click.echo("[AI] 正在AI分析截图内容...")
-        filename = await self.ai_analyzer.analyze_video_screenshots(
-            video_path, screenshot_paths
-        )
-
-        # 3. 如果AI分析失败，使用备用文件名
+        # 1. 提取并AI分析截图（失败时使用备用文件名）
+        if self.interactive:
+            click.echo("[AI] 正在提取并分析视频截图...")
+        filename = await self.analyze_video(video_path)
         if not filename:
-            filename = self.ai_analyzer.generate_fallback_filename(video_path)
-            logger.warning(f"使用备用文件名: {video_path.name} -> {filename}")
+            return None
 
-        # 4. 交互模式确认重命名
+        # 2. 交互模式确认重命名
         if self.interactive:
             click.echo(f"\n[SUGGEST] AI建议重命名为: {filename}")
 
@@ -176,10 +243,7 @@ class VideoRenamerApp:
                         if not filename.endswith('.mp4'):
                             filename += '.mp4'
 
-        # 5. 清理截图
-        self.video_processor.cleanup_temp_files(video_path)
-
-        logger.debug(f"处理完成: {video_path.name} -> {filename}")
+        logger.debug("处理完成: %s -> %s", video_path.name, filename)
         return filename
 
     def print_statistics(self):
@@ -226,7 +290,7 @@ def main(target_directory: Path, dry_run: bool, recursive: bool, workers: int, v
             return
 
     # 运行应用
-    app = VideoRenamerApp(str(target_directory), dry_run=dry_run, interactive=interactive)
+    app = VideoRenamerApp(str(target_directory), dry_run=dry_run, interactive=interactive, workers=workers)
 
     # 运行异步主函数
     result = asyncio.run(app.run())
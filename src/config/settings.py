@@ -3,7 +3,8 @@
 集中管理所有配置参数
 """
 import os
-from typing import Optional
+import functools
+from typing import Final, Literal, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from dotenv import load_dotenv
@@ -20,6 +21,12 @@ class Settings(BaseSettings):
         description="AI API服务地址 - 本机Docker部署"
     )
 
+    # 图片上传格式：json为base64内嵌，multipart为原始字节上传
+    api_upload_format: Literal["json", "multipart"] = Field(
+        default="json",
+        description="图片上传格式（json 或 multipart）"
+    )
+
     # 重试配置
     max_retries: int = Field(
         default=3,
@@ -64,6 +71,18 @@ class Settings(BaseSettings):
         description="临时截图目录"
     )
 
+    # 分析缓存配置
+    ai_cache_path: str = Field(
+        default=".ai_cache.sqlite3",
+        description="AI分析结果缓存数据库路径"
+    )
+
+    ai_cache_ttl: int = Field(
+        default=7 * 86400,
+        ge=0,
+        description="AI分析结果缓存有效期（秒）"
+    )
+
     # 日志配置
     log_level: str = Field(
         default="INFO",
@@ -72,7 +91,7 @@ class Settings(BaseSettings):
 
     # AI分析提示词
     analysis_prompt: str = Field(
-        default="""请分析这张视频截图，为视频文件生成一个合适的文件名。
+        default="""请分析以下视频截图（一张或多张，均来自同一个视频），为视频文件生成一个合适的文件名。
 
 要求：
 1. 识别视频中的人物特征（性别、年龄、外貌特征）
@@ -99,9 +118,14 @@ class Settings(BaseSettings):
         env_file = ".env"
         env_prefix = "VIDEO_RENAMER_"
 
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """获取配置实例（只实例化一次）"""
+    return Settings()
+
 # 全局配置实例
-settings = Settings()
+settings = get_settings()
 
-def get_settings() -> Settings:
-    """获取配置实例"""
-    return settings
\ No newline at end of file
+# 派生常量，供热点路径直接使用
+VIDEO_EXT_TUPLE: Final = tuple(ext.lower() for ext in settings.video_extensions)
+VIDEO_EXT_SET: Final = frozenset(VIDEO_EXT_TUPLE)
\ No newline at end of file
@@ -3,54 +3,109 @@ AI分析模块
 负责调用API分析图片内容并生成文件名建议
 """
 import asyncio
+import bisect
+import json
 import logging
+import time
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-import httpx
+from typing import List, Optional, Dict, Any, Tuple, Union
 from ..utils.image_utils import ImageUtils
 from ..utils.api_utils import APIUtils
 from ..utils.filename_utils import FilenameUtils
 from ..config.settings import settings
+from .ai_cache import AICache
 
 logger = logging.getLogger(__name__)
 
+# API连接探测成功后的有效期（秒），结果持久化以便多次运行复用
+_PROBE_TTL_SECONDS = 60
+_PROBE_CACHE_FILE = Path.home() / ".cache" / "porn-renamer" / "probe.ts"
+
+# 备用文件名的大小分档：<10MB, <100MB, <1000MB, 其余
+_SIZE_THRESHOLDS_BYTES = (10 << 20, 100 << 20, 1000 << 20)
+_SIZE_LABELS = ("小视频", "中视频", "大视频", "超大视频")
+
 class AIAnalyzer:
     """AI分析器"""
 
-    def __init__(self, api_url: str = None):
+    def __init__(self, api_url: str = None, cache: AICache = None):
         self.api_url = api_url or settings.api_url
         self.timeout = 30
+        self.cache = cache or AICache()
+        self._last_probe_ok_at = self._load_probe_timestamp()
+
+        # 复用同一个HTTP/2客户端，避免每次请求重新握手
+        self._client = APIUtils.build_client(self.timeout)
 
-    async def analyze_single_image(self, image_path: str) -> Optional[str]:
+    async def aclose(self):
         """
-        分析单个图片，返回文件名建议
+        关闭HTTP客户端和分析缓存
         """
-        try:
-            # 编码图片为base64
-            image_base64 = ImageUtils.encode_image_to_base64(image_path)
+        await self._client.aclose()
+        self.cache.close()
+
+    @staticmethod
+    def _read_image(image: Union[str, bytes]) -> bytes:
+        """
+        获取图片字节：内存中的JPEG直接返回，路径则读取文件
+        """
+        if isinstance(image, bytes):
+            return image
+        return Path(image).read_bytes()
 
-            # 创建API负载
-            payload = APIUtils.create_image_analysis_payload(image_base64)
+    async def analyze_single_image(self, image: Union[str, bytes]) -> Optional[str]:
+        """
+        分析单个图片（文件路径或JPEG字节），返回文件名建议
+        """
+        try:
+            # 读取图片并查询缓存
+            image_data = self._read_image(image)
+            cache_key = AICache.image_key(image_data)
+            cached_filename = self.cache.get(cache_key)
+            if cached_filename:
+                logger.debug("命中分析缓存: %s -> %s", cache_key, cached_filename)
+                return cached_filename
 
             # 调用API
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await APIUtils.call_api_with_retry(
-                    client, self.api_url, payload
-                )
-
-            if response:
-                # 解析响应
-                filename = APIUtils.parse_api_response(response)
-                if filename:
-                    # 生成完整的文件名（包含扩展名）
-                    return FilenameUtils.generate_safe_name(filename, ".mp4")
+            filename = await self._request_filename([image_data])
+            if filename:
+                self.cache.set(cache_key, filename)
 
-            return None
+            return filename
 
         except Exception as e:
-            logger.error(f"分析图片失败 {image_path}: {e}")
+            logger.error(f"分析图片失败 {image if isinstance(image, str) else '<内存图片>'}: {e}")
             return None
 
+    def _build_request(self, images_data: List[bytes]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        根据上传格式创建API负载，返回 (负载, multipart文件)
+        """
+        if settings.api_upload_format == "multipart":
+            return APIUtils.create_multipart_payload(images_data)
+
+        # JSON格式需要base64编码
+        images_base64 = [ImageUtils.encode_bytes_to_base64(data) for data in images_data]
+        return APIUtils.create_image_analysis_payload(images_base64), None
+
+    async def _request_filename(self, images_data: List[bytes]) -> Optional[str]:
+        """
+        调用API分析图片，并将响应解析为完整的文件名
+        """
+        payload, files = self._build_request(images_data)
+        response = await APIUtils.call_api_with_retry(
+            self._client, self.api_url, payload, files=files
+        )
+
+        if response:
+            # 解析响应
+            filename = APIUtils.parse_api_response(response)
+            if filename:
+                # 生成完整的文件名（包含扩展名）
+                return FilenameUtils.generate_safe_name(filename, ".mp4")
+
+        return None
+
     async def analyze_multiple_images(self, image_paths: List[str]) -> List[Optional[str]]:
         """
         并发分析多个图片，返回文件名建议列表
@@ -58,19 +113,19 @@ class AIAnalyzer:
         if not image_paths:
             return []
 
+        # 单张图片无需并发调度
+        if len(image_paths) == 1:
+            return [await self.analyze_single_image(image_paths[0])]
+
         tasks = [self.analyze_single_image(path) for path in image_paths]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
-        # 处理异常结果
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"分析第{i+1}张图片时发生异常: {result}")
-                processed_results.append(None)
-            else:
-                processed_results.append(result)
+        # 异常结果视为分析失败（单张分析已记录错误日志）
+        processed_results = [None if isinstance(result, Exception) else result for result in results]
 
-        logger.info(f"分析完成 {len(processed_results)} 张图片，成功 {sum(1 for r in processed_results if r)} 个")
+        if logger.isEnabledFor(logging.DEBUG):
+            success_count = sum(1 for result in processed_results if result)
+            logger.debug("分析完成 %d 张图片，成功 %d 个", len(processed_results), success_count)
         return processed_results
 
     async def select_best_filename(self, image_paths: List[str]) -> Optional[str]:
@@ -118,37 +173,84 @@ class AIAnalyzer:
     async def test_api_connection(self) -> bool:
         """
         测试API连接
+        近期探测成功时直接返回，跳过一次网络往返
         """
+        if time.time() - self._last_probe_ok_at < _PROBE_TTL_SECONDS:
+            logger.debug("API连接近期已验证，跳过探测")
+            return True
+
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                return await APIUtils.test_api_connection(client, self.api_url)
+            connected = await APIUtils.test_api_connection(self._client, self.api_url)
         except Exception as e:
             logger.error(f"API连接测试失败: {e}")
             return False
 
-    async def analyze_video_screenshots(self, video_path: Path, screenshot_paths: List[str]) -> Optional[str]:
+        if connected:
+            self._last_probe_ok_at = time.time()
+            self._save_probe_timestamp()
+
+        return connected
+
+    def _load_probe_timestamp(self) -> float:
+        """
+        读取上次探测成功的时间（仅限同一API地址）
+        """
+        try:
+            record = json.loads(_PROBE_CACHE_FILE.read_text(encoding="utf-8"))
+            if record.get("api_url") == self.api_url:
+                return float(record["timestamp"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        return 0.0
+
+    def _save_probe_timestamp(self):
+        """
+        持久化探测成功的时间
+        """
+        try:
+            _PROBE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            _PROBE_CACHE_FILE.write_text(
+                json.dumps({"api_url": self.api_url, "timestamp": self._last_probe_ok_at}),
+                encoding="utf-8"
+            )
+        except OSError as e:
+            logger.debug("保存API探测结果失败: %s", e)
+
+    async def analyze_video_screenshots(
+        self,
+        video_path: Path,
+        screenshots: List[Union[str, bytes]],
+        image_keys: Optional[List[str]] = None
+    ) -> Optional[str]:
         """
-        分析视频截图，返回文件名建议
+        分析视频截图（文件路径或JPEG字节），返回文件名建议
+        image_keys: 调用方已计算的截图缓存键，避免重复计算摘要
         """
         try:
             # 检查截图数量
-            if not screenshot_paths:
+            if not screenshots:
                 logger.warning(f"没有截图可供分析: {video_path.name}")
                 return None
 
-            # 如果只有一张截图，直接分析
-            if len(screenshot_paths) == 1:
-                filename = await self.analyze_single_image(screenshot_paths[0])
-                if filename:
-                    logger.info(f"单截图分析成功: {video_path.name} -> {filename}")
-                return filename
+            # 读取全部截图，以内容摘要查询视频级缓存
+            images_data = [self._read_image(image) for image in screenshots]
+            if image_keys is None:
+                image_keys = [AICache.image_key(data) for data in images_data]
+
+            video_key = AICache.video_key(image_keys)
+            cached_filename = self.cache.get(video_key)
+            if cached_filename:
+                logger.debug("命中视频缓存: %s -> %s", video_path.name, cached_filename)
+                return cached_filename
 
-            # 多张截图，选择最佳结果
-            filename = await self.select_best_filename(screenshot_paths)
+            # 所有截图合并为一次请求
+            filename = await self._request_filename(images_data)
             if filename:
-                logger.info(f"多截图分析成功: {video_path.name} -> {filename}")
+                logger.debug("截图分析成功: %s -> %s", video_path.name, filename)
+                self.cache.set(video_key, filename)
             else:
-                logger.warning(f"多截图分析失败: {video_path.name}")
+                logger.warning(f"截图分析失败: {video_path.name}")
 
             return filename
 
@@ -206,20 +308,9 @@ class AIAnalyzer:
         生成备用文件名（当AI分析失败时使用）
         """
         # 基于文件大小或时间戳生成简单的文件名
-        import time
-
         try:
-            file_size_mb = video_path.stat().st_size / (1024 * 1024)
-            timestamp = int(time.time())
-
-            if file_size_mb < 10:
-                return f"小视频_{timestamp}.mp4"
-            elif file_size_mb < 100:
-                return f"中视频_{timestamp}.mp4"
-            elif file_size_mb < 1000:
-                return f"大视频_{timestamp}.mp4"
-            else:
-                return f"超大视频_{timestamp}.mp4"
+            size_index = bisect.bisect_right(_SIZE_THRESHOLDS_BYTES, video_path.stat().st_size)
+            return f"{_SIZE_LABELS[size_index]}_{int(time.time())}.mp4"
 
         except Exception:
             return f"未命名视频_{int(time.time())}.mp4"
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+AI分析缓存模块
+以图片内容摘要为键，持久化保存AI生成的文件名，避免重复调用API
+"""
+import hashlib
+import logging
+import sqlite3
+import time
+from typing import Iterable, Optional
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class AICache:
+    """AI分析结果缓存（基于SQLite）"""
+
+    def __init__(self, db_path: str = None, ttl: int = None):
+        self.db_path = db_path or settings.ai_cache_path
+        self.ttl = ttl if ttl is not None else settings.ai_cache_ttl
+
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            "key TEXT PRIMARY KEY, filename TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def image_key(image_data: bytes) -> str:
+        """
+        计算图片内容的缓存键
+        """
+        return hashlib.blake2b(image_data, digest_size=16).hexdigest()
+
+    @staticmethod
+    def video_key(image_keys: Iterable[str]) -> str:
+        """
+        根据视频全部截图的缓存键计算视频级缓存键
+        """
+        joined = "|".join(sorted(image_keys)).encode("ascii")
+        return "video:" + hashlib.blake2b(joined, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存，过期或不存在时返回None
+        """
+        try:
+            row = self._conn.execute(
+                "SELECT filename, expires_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"读取分析缓存失败: {e}")
+            return None
+
+        if row is None or row[1] < time.time():
+            return None
+
+        return row[0]
+
+    def set(self, key: str, filename: str) -> None:
+        """
+        写入缓存
+        """
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, filename, expires_at) VALUES (?, ?, ?)",
+                (key, filename, time.time() + self.ttl)
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"写入分析缓存失败: {e}")
+
+    def close(self) -> None:
+        """
+        关闭缓存数据库
+        """
+        self._conn.close()
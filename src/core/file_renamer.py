@@ -3,77 +3,141 @@
 负责安全重命名文件、冲突检测和操作日志
 """
 import os
+import json
+import stat
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 from ..utils.filename_utils import FilenameUtils
-from ..config.settings import settings
+from ..config.settings import VIDEO_EXT_SET
+from .phash import video_hash, group_by_hamming
 
 logger = logging.getLogger(__name__)
 
+# 批量重命名的并发线程数
+_RENAME_WORKERS = 8
+
+# 文件名非法字符删除表（供str.translate使用）及长度限制
+_INVALID_CHARS_TABLE = {ord(char): None for char in '<>:"/\\|?*'}
+_NAME_MAX = 255  # Windows文件名长度限制
+
 class FileRenamer:
     """文件重命名器"""
 
-    def __init__(self, dry_run: bool = False):
+    def __init__(self, dry_run: bool = False, log_file_path: str = None):
         self.dry_run = dry_run  # 试运行模式，不实际重命名
-        self.rename_log = []
 
-    def rename_single_file(self, original_path: Path, new_name: str) -> bool:
+        # 重命名日志以JSONL格式逐条追加写入，不在内存中累积
+        self.log_file_path = log_file_path or f"rename_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self._log_file = None
+        self._log_total = 0
+        self._log_success = 0
+
+    def rename_single_file(self, original_path: Path, new_name: str, *, stat_result: os.stat_result = None) -> bool:
         """
         重命名单个文件
+        stat_result: 调用方已获取的原文件stat结果，避免重复系统调用
         """
         try:
             # 验证原文件
-            if not original_path.exists():
-                logger.error(f"原文件不存在: {original_path}")
-                return False
+            if stat_result is None:
+                try:
+                    stat_result = original_path.stat()
+                except FileNotFoundError:
+                    logger.error(f"原文件不存在: {original_path}")
+                    return False
 
-            if not original_path.is_file():
+            if not stat.S_ISREG(stat_result.st_mode):
                 logger.error(f"路径不是文件: {original_path}")
                 return False
 
-            # 生成新文件路径
-            new_path = self._generate_new_path(original_path, new_name)
+            return self._rename_file(original_path, new_name, datetime.now().isoformat())
+
+        except Exception as e:
+            logger.error(f"重命名文件异常 {original_path}: {e}")
+            return False
+
+    def _rename_file(self, original_path: Path, new_name: str, timestamp: str) -> bool:
+        """
+        执行重命名并记录日志（调用方负责校验原文件）
+        """
+        try:
+            # 生成新文件路径（实际重命名时预先占用目标路径）
+            new_path = self._generate_new_path(original_path, new_name, reserve=not self.dry_run)
 
             # 检查是否需要重命名
             if original_path.name == new_path.name:
                 logger.info(f"文件名未改变，跳过: {original_path.name}")
                 return True
 
-            # 记录重命名操作
-            log_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "original_path": str(original_path),
-                "original_name": original_path.name,
-                "new_path": str(new_path),
-                "new_name": new_path.name,
-                "success": False
-            }
-
-            try:
-                if self.dry_run:
-                    logger.info(f"[试运行] 将重命名: {original_path.name} -> {new_path.name}")
-                    log_entry["success"] = True
-                    log_entry["dry_run"] = True
-                else:
-                    # 执行重命名
-                    original_path.rename(new_path)
-                    logger.info(f"重命名成功: {original_path.name} -> {new_path.name}")
-                    log_entry["success"] = True
-
-            except Exception as e:
-                logger.error(f"重命名失败: {original_path.name} -> {new_path.name}: {e}")
-                log_entry["error"] = str(e)
-
-            # 添加到日志
-            self.rename_log.append(log_entry)
-            return log_entry["success"]
+            error = None if self.dry_run else self._replace_file(original_path, new_path)
+            return self._log_rename(original_path, new_path, timestamp, error)
 
         except Exception as e:
             logger.error(f"重命名文件异常 {original_path}: {e}")
             return False
 
+    @staticmethod
+    def _replace_file(original_path: Path, new_path: Path) -> Optional[str]:
+        """
+        执行重命名（目标路径已解决冲突并创建了占位文件），失败时返回错误信息
+        """
+        replaced = False
+        try:
+            os.replace(original_path, new_path)
+            replaced = True
+            return None
+        except OSError as e:
+            return str(e)
+        finally:
+            # 未完成替换时移除占位文件
+            if not replaced:
+                try:
+                    new_path.unlink(missing_ok=True)
+                except OSError:
+                    pass
+
+    def _reserve_and_replace(self, original_path: Path, new_path: Path) -> Tuple[Path, Optional[str]]:
+        """
+        占用目标路径后立即执行重命名
+        返回 (实际目标路径, 错误信息)；目标被外部占用时自动顺延数字后缀
+        """
+        try:
+            new_path = FilenameUtils.resolve_filename_conflict(new_path, reserve=True)
+        except OSError as e:
+            return new_path, str(e)
+
+        return new_path, self._replace_file(original_path, new_path)
+
+    def _log_rename(self, original_path: Path, new_path: Path, timestamp: str, error: Optional[str]) -> bool:
+        """
+        记录重命名操作结果
+        """
+        log_entry = {
+            "timestamp": timestamp,
+            "original_path": str(original_path),
+            "original_name": original_path.name,
+            "new_path": str(new_path),
+            "new_name": new_path.name,
+            "success": error is None
+        }
+
+        if error is not None:
+            logger.error(f"重命名失败: {original_path.name} -> {new_path.name}: {error}")
+            log_entry["error"] = error
+        elif self.dry_run:
+            logger.info(f"[试运行] 将重命名: {original_path.name} -> {new_path.name}")
+            log_entry["dry_run"] = True
+        else:
+            logger.info(f"重命名成功: {original_path.name} -> {new_path.name}")
+
+        # 添加到日志
+        self._append_log(log_entry)
+        return log_entry["success"]
+
     def batch_rename_files(self, rename_map: Dict[Path, str]) -> Dict[str, Any]:
         """
         批量重命名文件
@@ -89,49 +153,114 @@ class FileRenamer:
 
         logger.info(f"开始批量重命名 {results['total']} 个文件")
 
+        # 整批操作共用一个时间戳
+        timestamp = datetime.now().isoformat()
+
+        # 1. 串行校验原文件并确定新路径，已分配的路径不会再分配给其他文件
+        planned = []
+        claimed_paths = set()
+
         for original_path, new_name in rename_map.items():
             try:
-                # 检查文件是否存在
-                if not original_path.exists():
+                # 检查文件是否存在（一次stat同时获取类型）
+                try:
+                    file_stat = original_path.stat()
+                except FileNotFoundError:
+                    file_stat = None
+
+                if file_stat is None:
                     logger.warning(f"文件不存在，跳过: {original_path}")
                     results["skipped"] += 1
                     continue
 
-                # 执行重命名
-                success = self.rename_single_file(original_path, new_name)
+                if not stat.S_ISREG(file_stat.st_mode):
+                    logger.error(f"路径不是文件: {original_path}")
+                    self._record_operation(results, original_path, new_name, False)
+                    continue
 
-                if success:
-                    results["success"] += 1
-                else:
-                    results["failed"] += 1
+                new_path = self._generate_new_path(original_path, new_name, claimed_paths)
 
-                # 记录操作
-                results["rename_operations"].append({
-                    "original_path": str(original_path),
-                    "new_name": new_name,
-                    "success": success
-                })
+                # 检查是否需要重命名
+                if original_path.name == new_path.name:
+                    logger.info(f"文件名未改变，跳过: {original_path.name}")
+                    self._record_operation(results, original_path, new_name, True)
+                    continue
+
+                claimed_paths.add(new_path)
+                planned.append((original_path, new_name, new_path))
 
             except Exception as e:
                 logger.error(f"批量重命名异常 {original_path}: {e}")
                 results["failed"] += 1
 
+        # 2. 并发执行重命名，各文件互不依赖，可重叠系统调用等待
+        if self.dry_run:
+            for original_path, new_name, new_path in planned:
+                success = self._log_rename(original_path, new_path, timestamp, None)
+                self._record_operation(results, original_path, new_name, success)
+        else:
+            with ThreadPoolExecutor(max_workers=_RENAME_WORKERS) as executor:
+                # 每个任务在重命名前一刻才占用目标路径，不会提前留下占位文件
+                pending = {
+                    executor.submit(self._reserve_and_replace, original_path, new_path): (original_path, new_name)
+                    for original_path, new_name, new_path in planned
+                }
+                try:
+                    # 3. 每完成一个重命名立即写入日志，中途崩溃时已完成的操作仍可撤销
+                    for future in as_completed(list(pending)):
+                        original_path, new_name = pending.pop(future)
+                        new_path, error = future.result()
+                        success = self._log_rename(original_path, new_path, timestamp, error)
+                        self._record_operation(results, original_path, new_name, success)
+                finally:
+                    # 中断时取消尚未开始的重命名，并为已执行的重命名补写日志
+                    for future in pending:
+                        future.cancel()
+                    for future, (original_path, new_name) in pending.items():
+                        if not future.cancelled():
+                            new_path, error = future.result()
+                            self._log_rename(original_path, new_path, timestamp, error)
+
         logger.info(f"批量重命名完成: {results}")
         return results
 
-    def _generate_new_path(self, original_path: Path, new_name: str) -> Path:
+    @staticmethod
+    def _record_operation(results: Dict[str, Any], original_path: Path, new_name: str, success: bool):
+        """
+        记录批量重命名中的单个操作
+        """
+        if success:
+            results["success"] += 1
+        else:
+            results["failed"] += 1
+
+        results["rename_operations"].append({
+            "original_path": str(original_path),
+            "new_name": new_name,
+            "success": success
+        })
+
+    def _generate_new_path(
+        self,
+        original_path: Path,
+        new_name: str,
+        claimed_paths: Set[Path] = None,
+        reserve: bool = False
+    ) -> Path:
         """
         生成新的文件路径，处理文件名冲突
+        claimed_paths: 已分配给其他文件、尚未实际创建的路径
+        reserve: 创建占位文件原子占用目标路径（仅实际重命名时使用）
         """
         # 确保新文件名有正确的扩展名
-        if not any(new_name.lower().endswith(ext) for ext in settings.video_extensions):
+        if os.path.splitext(new_name)[1].lower() not in VIDEO_EXT_SET:
             new_name = new_name + original_path.suffix
 
         # 创建新路径
         new_path = original_path.parent / new_name
 
         # 处理文件名冲突
-        return FilenameUtils.resolve_filename_conflict(new_path)
+        return FilenameUtils.resolve_filename_conflict(new_path, claimed_paths, reserve=reserve)
 
     def preview_rename(self, rename_map: Dict[Path, str]) -> List[Dict[str, str]]:
         """
@@ -162,7 +291,7 @@ class FileRenamer:
         undo_count = 0
 
         # 反向遍历日志，从最后的操作开始撤销
-        for log_entry in reversed(self.rename_log):
+        for log_entry in reversed(self._read_rename_log()):
             if log_entry.get("success") and not log_entry.get("dry_run"):
                 try:
                     original_path = Path(log_entry["original_path"])
@@ -182,19 +311,47 @@ class FileRenamer:
         logger.info(f"撤销完成，共撤销 {undo_count} 个操作")
         return undo_success
 
-    def save_rename_log(self, log_file_path: str = None) -> bool:
+    def _append_log(self, log_entry: Dict[str, Any]):
         """
-        保存重命名日志到文件
+        追加一条重命名日志
+        行缓冲：每条写入即交给操作系统，进程被强杀时已完成的重命名仍可撤销
         """
-        if log_file_path is None:
-            log_file_path = f"rename_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        if self._log_file is None:
+            self._log_file = open(self.log_file_path, 'a', encoding='utf-8', buffering=1)
+
+        self._log_file.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+        self._log_total += 1
+        if log_entry["success"]:
+            self._log_success += 1
+
+    def _read_rename_log(self) -> List[Dict[str, Any]]:
+        """
+        读取本次会话的重命名日志
+        """
+        if self._log_file is not None:
+            self._log_file.flush()
+
+        if not os.path.exists(self.log_file_path):
+            return []
+
+        with open(self.log_file_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def save_rename_log(self) -> bool:
+        """
+        将重命名日志落盘并关闭日志文件
+        """
+        if self._log_file is None:
+            logger.info("没有新的重命名日志需要保存")
+            return True
 
         try:
-            import json
-            with open(log_file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.rename_log, f, ensure_ascii=False, indent=2)
+            self._log_file.flush()
+            os.fsync(self._log_file.fileno())
+            self._log_file.close()
+            self._log_file = None
 
-            logger.info(f"重命名日志已保存到: {log_file_path}")
+            logger.info(f"重命名日志已保存到: {self.log_file_path}")
             return True
 
         except Exception as e:
@@ -205,8 +362,8 @@ class FileRenamer:
         """
         获取重命名统计信息
         """
-        total_operations = len(self.rename_log)
-        successful_operations = sum(1 for entry in self.rename_log if entry.get("success"))
+        total_operations = self._log_total
+        successful_operations = self._log_success
 
         return {
             "total_operations": total_operations,
@@ -239,30 +396,33 @@ class FileRenamer:
                 continue
 
             # 检查文件名长度
-            if len(new_name) > 255:  # Windows文件名长度限制
+            if len(new_name) > _NAME_MAX:
                 validation_result["warnings"].append(f"文件名过长: {new_name[:50]}...")
 
             # 检查文件名字符
-            invalid_chars = '<>:"/\\|?*'
-            if any(char in new_name for char in invalid_chars):
+            if len(new_name.translate(_INVALID_CHARS_TABLE)) != len(new_name):
                 validation_result["errors"].append(f"文件名包含非法字符: {new_name}")
                 validation_result["valid"] = False
 
         return validation_result
 
-    def cleanup_duplicate_files(self, directory: Path) -> Dict[str, Any]:
+    def cleanup_duplicate_files(self, directory: Path, perceptual: bool = False) -> Dict[str, Any]:
         """
         清理重复文件（基于文件名模式）
+        perceptual为True时改为按视频内容的感知哈希分组
         返回清理结果
         """
+        # 读取目录项（scandir一次读取，修改时间随目录项缓存）
+        with os.scandir(directory) as entries:
+            files = [(entry.name, entry.path, entry.stat().st_mtime) for entry in entries if entry.is_file()]
+
         # 查找可能的重复文件
-        file_groups = {}
-        for file_path in directory.glob("*"):
-            if file_path.is_file():
-                base_name = self._extract_base_name(file_path.name)
-                if base_name not in file_groups:
-                    file_groups[base_name] = []
-                file_groups[base_name].append(file_path)
+        if perceptual:
+            file_groups = self._group_by_content(files)
+        else:
+            file_groups = defaultdict(list)
+            for name, path, mtime in files:
+                file_groups[self._extract_base_name(name)].append((path, mtime))
 
         # 找到有重复的组
         duplicates = {k: v for k, v in file_groups.items() if len(v) > 1}
@@ -277,30 +437,37 @@ class FileRenamer:
         # 对于每组重复文件，保留最新的一个
         for group_name, file_list in duplicates.items():
             # 按修改时间排序，最新的在前
-            file_list.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+            file_list.sort(key=lambda f: f[1], reverse=True)
 
             # 保留最新的，其余标记为删除
-            results["files_to_keep"].append(str(file_list[0]))
-            results["files_to_remove"].extend(str(f) for f in file_list[1:])
+            results["files_to_keep"].append(file_list[0][0])
+            results["files_to_remove"].extend(path for path, _ in file_list[1:])
 
         return results
 
-    def _extract_base_name(self, filename: str) -> str:
+    def _group_by_content(self, files: List[tuple]) -> Dict[int, List[tuple]]:
         """
-        提取基础文件名（移除数字后缀）
+        按视频感知哈希的汉明距离分组
         """
-        import re
-        name_part = os.path.splitext(filename)[0]
+        hashed_files = []
+        for name, path, mtime in files:
+            if os.path.splitext(name)[1].lower() in VIDEO_EXT_SET:
+                phash = video_hash(Path(path))
+                if phash is not None:
+                    hashed_files.append((path, mtime, phash))
+
+        file_groups = defaultdict(list)
+        if not hashed_files:
+            return file_groups
 
-        # 移除常见的数字后缀模式
-        patterns = [
-            r'_\d+$',
-            r'\(\d+\)$',
-            r'-\d+$',
-            r'\s\d+$',
-        ]
+        labels = group_by_hamming([phash for _, _, phash in hashed_files])
+        for (path, mtime, _), label in zip(hashed_files, labels):
+            file_groups[int(label)].append((path, mtime))
 
-        for pattern in patterns:
-            name_part = re.sub(pattern, '', name_part)
+        return file_groups
 
-        return name_part
\ No newline at end of file
+    def _extract_base_name(self, filename: str) -> str:
+        """
+        提取基础文件名（移除数字后缀）
+        """
+        return FilenameUtils.extract_base_name(filename)
\ No newline at end of file
@@ -4,13 +4,123 @@
 """
 import os
 import logging
+from collections import defaultdict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, List, Optional, Tuple, Union
 from ..utils.filename_utils import FilenameUtils
-from ..config.settings import settings
+from ..config.settings import settings, VIDEO_EXT_SET
 
 logger = logging.getLogger(__name__)
 
+# 并行遍历：线程数，以及顶层子目录数超过该值时才启用
+_SCAN_WORKERS = 16
+_PARALLEL_SUBDIR_THRESHOLD = 4
+
+# 视频扩展名集合（不含点号），用于按文件名快速判断
+_VIDEO_SUFFIXES = frozenset(ext.lstrip('.') for ext in VIDEO_EXT_SET)
+
+def _has_video_suffix(filename: str) -> bool:
+    """
+    按文件名后缀判断是否为视频文件
+    """
+    stem, dot, suffix = filename.rpartition('.')
+    return bool(dot and stem) and suffix.lower() in _VIDEO_SUFFIXES
+
+def _scan_one_dir(directory: str) -> Tuple[List[os.DirEntry], List[str]]:
+    """
+    读取单个目录，返回 (普通文件DirEntry列表, 子目录路径列表)
+    文件类型来自目录读取结果，无需逐个stat
+    """
+    files, subdirs = [], []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    files.append(entry)
+                elif entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+    except OSError as e:
+        logger.warning(f"无法读取目录 {directory}: {e}")
+    return files, subdirs
+
+def _iter_scandir(root: str, recursive: bool = True) -> Iterator[os.DirEntry]:
+    """
+    遍历目录，产出所有普通文件的 DirEntry
+    顶层子目录较多时并行读取各目录，否则使用显式栈顺序遍历
+    """
+    files, subdirs = _scan_one_dir(root)
+    yield from files
+
+    if not recursive:
+        return
+
+    if len(subdirs) > _PARALLEL_SUBDIR_THRESHOLD:
+        yield from _scan_parallel(subdirs)
+        return
+
+    while subdirs:
+        files, child_dirs = _scan_one_dir(subdirs.pop())
+        yield from files
+        subdirs.extend(child_dirs)
+
+def _scan_parallel(directories: List[str]) -> List[os.DirEntry]:
+    """
+    使用线程池并行遍历目录树
+    目录读取受系统调用延迟限制，多线程可重叠等待；各任务返回独立列表，在主线程合并
+    """
+    files = []
+    with ThreadPoolExecutor(max_workers=_SCAN_WORKERS) as executor:
+        pending = {executor.submit(_scan_one_dir, directory) for directory in directories}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dir_files, subdirs = future.result()
+                files.extend(dir_files)
+                pending.update(executor.submit(_scan_one_dir, subdir) for subdir in subdirs)
+    return files
+
+@dataclass(slots=True)
+class FileRecord:
+    """
+    扫描得到的文件记录
+    保存扫描时获取的大小、修改时间和权限，下游过滤无需再次stat
+    """
+    path: Path
+    size: int
+    mtime: float
+    mode: int
+
+    @classmethod
+    def from_stat(cls, path: Union[str, Path], file_stat: os.stat_result) -> "FileRecord":
+        """由stat结果创建文件记录"""
+        return cls(Path(path), file_stat.st_size, file_stat.st_mtime, file_stat.st_mode)
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    def __fspath__(self) -> str:
+        return str(self.path)
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+def from_path_list(paths: List[Path]) -> List[FileRecord]:
+    """
+    将路径列表转换为文件记录列表，无法访问的文件会被跳过
+    """
+    records = []
+    for path in paths:
+        try:
+            records.append(FileRecord.from_stat(path, os.stat(path)))
+        except OSError as e:
+            logger.warning(f"无法获取文件信息 {path}: {e}")
+    return records
+
+FileLike = Union[Path, os.DirEntry, FileRecord]
+
 class FileScanner:
     """文件扫描器"""
 
@@ -18,6 +128,22 @@ class FileScanner:
         self.target_directory = Path(target_directory)
         self.video_extensions = [ext.lower() for ext in settings.video_extensions]
 
+    @staticmethod
+    def _record(file_path: FileLike, fresh: bool = False) -> FileRecord:
+        """
+        获取文件记录，每次调用每个文件最多stat一次，文件不存在时抛出 FileNotFoundError
+        扫描记录和DirEntry直接复用扫描时的信息；fresh为True时总是重新stat
+        """
+        if isinstance(file_path, FileRecord):
+            if not fresh:
+                return file_path
+            file_path = file_path.path
+
+        if isinstance(file_path, os.DirEntry) and not fresh:
+            return FileRecord.from_stat(file_path.path, file_path.stat())
+
+        return FileRecord.from_stat(file_path, os.stat(file_path))
+
     def scan_directory(self, recursive: bool = True) -> List[Path]:
         """
         扫描目标目录，返回所有视频文件
@@ -26,16 +152,35 @@ class FileScanner:
             logger.error(f"目标目录不存在: {self.target_directory}")
             return []
 
-        video_files = []
-        pattern = "**/*" if recursive else "*"
-
-        for file_path in self.target_directory.glob(pattern):
-            if file_path.is_file() and FilenameUtils.is_video_file(file_path):
-                video_files.append(file_path)
+        video_files = [
+            Path(entry.path)
+            for entry in _iter_scandir(str(self.target_directory), recursive)
+            if _has_video_suffix(entry.name)
+        ]
 
         logger.info(f"扫描完成，找到 {len(video_files)} 个视频文件")
         return video_files
 
+    def scan_records(self, recursive: bool = True) -> List[FileRecord]:
+        """
+        扫描目标目录，返回所有视频文件的记录（含大小、修改时间和权限）
+        """
+        if not self.target_directory.exists():
+            logger.error(f"目标目录不存在: {self.target_directory}")
+            return []
+
+        records = []
+        for entry in _iter_scandir(str(self.target_directory), recursive):
+            if not _has_video_suffix(entry.name):
+                continue
+            try:
+                records.append(FileRecord.from_stat(entry.path, entry.stat(follow_symlinks=False)))
+            except OSError as e:
+                logger.warning(f"无法获取文件信息 {entry.path}: {e}")
+
+        logger.info(f"扫描完成，找到 {len(records)} 个视频文件")
+        return records
+
     def find_garbled_files(self, recursive: bool = True) -> List[Path]:
         """
         查找乱码文件名的视频文件
@@ -50,7 +195,7 @@ class FileScanner:
         logger.info(f"找到 {len(garbled_files)} 个乱码文件名的视频文件")
         return garbled_files
 
-    def filter_by_size(self, files: List[Path], min_size_mb: int = 1, max_size_mb: Optional[int] = None) -> List[Path]:
+    def filter_by_size(self, files: List[FileLike], min_size_mb: int = 1, max_size_mb: Optional[int] = None) -> List[FileLike]:
         """
         按文件大小过滤
         """
@@ -60,16 +205,16 @@ class FileScanner:
 
         for file_path in files:
             try:
-                file_size = file_path.stat().st_size
+                file_size = self._record(file_path).size
 
                 # 检查最小大小
                 if file_size < min_size_bytes:
-                    logger.debug(f"文件过小，跳过: {file_path.name} ({file_size} bytes)")
+                    logger.debug("文件过小，跳过: %s (%d bytes)", file_path.name, file_size)
                     continue
 
                 # 检查最大大小
                 if max_size_bytes and file_size > max_size_bytes:
-                    logger.debug(f"文件过大，跳过: {file_path.name} ({file_size} bytes)")
+                    logger.debug("文件过大，跳过: %s (%d bytes)", file_path.name, file_size)
                     continue
 
                 filtered_files.append(file_path)
@@ -84,7 +229,7 @@ class FileScanner:
         """
         按文件扩展名过滤
         """
-        target_extensions = [ext.lower() for ext in extensions]
+        target_extensions = frozenset(ext.lower() for ext in extensions)
         filtered_files = []
 
         for file_path in files:
@@ -99,17 +244,14 @@ class FileScanner:
         查找可能的重复文件（基于文件名模式）
         返回按基础文件名分组的字典
         """
-        duplicates = {}
+        groups = defaultdict(list)
 
         for file_path in files:
             # 提取基础文件名（移除可能的数字后缀）
-            base_name = self._extract_base_name(file_path.name)
-            if base_name not in duplicates:
-                duplicates[base_name] = []
-            duplicates[base_name].append(file_path)
+            groups[self._extract_base_name(file_path.name)].append(file_path)
 
         # 只保留有多个文件的组
-        duplicates = {k: v for k, v in duplicates.items() if len(v) > 1}
+        duplicates = {k: v for k, v in groups.items() if len(v) > 1}
 
         logger.info(f"发现 {len(duplicates)} 组可能的重复文件")
         return duplicates
@@ -119,24 +261,9 @@ class FileScanner:
         提取基础文件名（移除数字后缀）
         例如：file1.mp4 -> file, file(1).mp4 -> file
         """
-        name_part = os.path.splitext(filename)[0]
-
-        # 移除末尾的数字
-        import re
-        # 匹配模式：_数字, (数字), -数字 等
-        patterns = [
-            r'_\d+$',  # file_1
-            r'\(\d+\)$',  # file(1)
-            r'-\d+$',  # file-1
-            r'\s\d+$',  # file 1
-        ]
-
-        for pattern in patterns:
-            name_part = re.sub(pattern, '', name_part)
-
-        return name_part
+        return FilenameUtils.extract_base_name(filename)
 
-    def validate_files(self, files: List[Path]) -> List[Path]:
+    def validate_files(self, files: List[FileLike]) -> List[FileLike]:
         """
         验证文件列表，移除无效或不可访问的文件
         """
@@ -144,8 +271,10 @@ class FileScanner:
 
         for file_path in files:
             try:
-                # 检查文件是否存在
-                if not file_path.exists():
+                # 检查文件是否存在（重新stat获取大小，不使用扫描时的旧信息）
+                try:
+                    record = self._record(file_path, fresh=True)
+                except FileNotFoundError:
                     logger.warning(f"文件不存在: {file_path}")
                     continue
 
@@ -155,7 +284,7 @@ class FileScanner:
                     continue
 
                 # 检查文件大小（避免空文件）
-                if file_path.stat().st_size == 0:
+                if record.size == 0:
                     logger.warning(f"文件为空: {file_path}")
                     continue
 
@@ -167,7 +296,7 @@ class FileScanner:
         logger.info(f"验证后剩余 {len(valid_files)} 个有效文件")
         return valid_files
 
-    def get_scan_summary(self, files: List[Path]) -> dict:
+    def get_scan_summary(self, files: List[FileLike]) -> dict:
         """
         获取扫描摘要信息
         """
@@ -179,7 +308,7 @@ class FileScanner:
                 "size_distribution": {}
             }
 
-        total_size = sum(f.stat().st_size for f in files if f.exists())
+        total_size = 0
         extensions = {}
         size_distribution = {
             "small": 0,    # < 10MB
@@ -188,23 +317,27 @@ class FileScanner:
             "huge": 0      # > 1GB
         }
 
+        # 单次遍历同时统计总大小、扩展名和大小分布
         for file_path in files:
             try:
-                if file_path.exists():
-                    ext = file_path.suffix.lower()
-                    extensions[ext] = extensions.get(ext, 0) + 1
-
-                    size_mb = file_path.stat().st_size / (1024 * 1024)
-                    if size_mb < 10:
-                        size_distribution["small"] += 1
-                    elif size_mb < 100:
-                        size_distribution["medium"] += 1
-                    elif size_mb < 1000:
-                        size_distribution["large"] += 1
-                    else:
-                        size_distribution["huge"] += 1
+                file_size = self._record(file_path).size
             except OSError:
-                pass
+                continue
+
+            total_size += file_size
+
+            ext = os.path.splitext(file_path.name)[1].lower()
+            extensions[ext] = extensions.get(ext, 0) + 1
+
+            size_mb = file_size / (1024 * 1024)
+            if size_mb < 10:
+                size_distribution["small"] += 1
+            elif size_mb < 100:
+                size_distribution["medium"] += 1
+            elif size_mb < 1000:
+                size_distribution["large"] += 1
+            else:
+                size_distribution["huge"] += 1
 
         return {
             "total_files": len(files),
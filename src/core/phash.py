@@ -0,0 +1,66 @@
+"""
+感知哈希模块
+为视频计算64位感知哈希，并按汉明距离对内容相近的视频分组
+"""
+import logging
+from pathlib import Path
+from typing import Optional, Sequence
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def frame_hash(frame: np.ndarray) -> int:
+    """
+    计算单帧的64位差值哈希（dHash）
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+
+    # 相邻像素比较得到64位
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+def video_hash(video_path: Path) -> Optional[int]:
+    """
+    取视频中间帧计算感知哈希
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if not cap.isOpened():
+            return None
+
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total_frames > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, total_frames // 2)
+
+        ret, frame = cap.read()
+        return frame_hash(frame) if ret else None
+    except Exception as e:
+        logger.warning(f"计算视频感知哈希失败 {video_path}: {e}")
+        return None
+    finally:
+        cap.release()
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """
+    逐元素统计uint64中置位的比特数
+    """
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+def group_by_hamming(hashes: Sequence[int], threshold: int = 4) -> np.ndarray:
+    """
+    按汉明距离对哈希分组，返回每个哈希所属组的标签
+    每个未分组的哈希作为组首，与全部哈希的距离一次向量化计算
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    labels = np.full(len(hashes), -1, dtype=np.int32)
+
+    for i in range(len(hashes)):
+        if labels[i] >= 0:
+            continue
+
+        distances = _popcount(hashes ^ hashes[i])
+        labels[(distances <= threshold) & (labels < 0)] = i
+
+    return labels
@@ -3,16 +3,59 @@
 负责视频截图、关键帧提取和预处理
 """
 import os
+import asyncio
+import functools
 import cv2
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 import numpy as np
 from ..utils.image_utils import ImageUtils
 from ..config.settings import settings
 
+# 可选依赖：PyAV只需打开一次容器即可按时间点定位，未安装时使用OpenCV逐帧打开
+try:
+    import av
+except ImportError:
+    av = None
+
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1024)
+def _probe_video_info(video_path: str, mtime_ns: int, size: int) -> Optional[dict]:
+    """
+    打开视频读取基本信息
+    修改时间和大小作为缓存键的一部分，文件变化后自动重新探测
+    """
+    try:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return None
+
+        # 获取视频基本信息
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        # 计算时长
+        duration = total_frames / fps if fps > 0 else 0
+
+        cap.release()
+
+        return {
+            "fps": fps,
+            "total_frames": total_frames,
+            "width": width,
+            "height": height,
+            "duration": duration,
+            "file_size_mb": round(size / (1024 * 1024), 2)
+        }
+    except Exception as e:
+        logger.error(f"获取视频信息失败 {video_path}: {e}")
+        return None
+
 class VideoProcessor:
     """视频处理器"""
 
@@ -41,35 +84,17 @@ class VideoProcessor:
     def get_video_info(self, video_path: Path) -> Optional[dict]:
         """
         获取视频信息
+        结果按 (路径, 修改时间, 大小) 缓存，文件未变化时不重新打开视频
         """
         try:
-            cap = cv2.VideoCapture(str(video_path))
-            if not cap.isOpened():
-                return None
-
-            # 获取视频基本信息
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-            # 计算时长
-            duration = total_frames / fps if fps > 0 else 0
-
-            cap.release()
-
-            return {
-                "fps": fps,
-                "total_frames": total_frames,
-                "width": width,
-                "height": height,
-                "duration": duration,
-                "file_size_mb": round(video_path.stat().st_size / (1024 * 1024), 2)
-            }
-        except Exception as e:
+            file_stat = video_path.stat()
+        except OSError as e:
             logger.error(f"获取视频信息失败 {video_path}: {e}")
             return None
 
+        video_info = _probe_video_info(str(video_path), file_stat.st_mtime_ns, file_stat.st_size)
+        return dict(video_info) if video_info else None
+
     def calculate_screenshot_positions(self, duration: float, count: int = None) -> List[float]:
         """
         计算截图时间点（秒）
@@ -136,25 +161,26 @@ class VideoProcessor:
             logger.error(f"提取视频帧失败 {video_path} @ {time_seconds}s: {e}")
             return None
 
-    def extract_key_frames(self, video_path: Path) -> List[str]:
+    def _iter_frames(self, video_path: Path) -> Iterator[Tuple[int, np.ndarray]]:
         """
-        提取视频关键帧并保存为图片
-        返回截图文件路径列表
+        在计算出的截图时间点逐个提取预处理后的视频帧
+        产出 (序号, 帧)
         """
+        if av is not None:
+            yield from self._iter_frames_av(video_path)
+            return
+
         # 获取视频信息
         video_info = self.get_video_info(video_path)
         if not video_info:
             logger.error(f"无法获取视频信息: {video_path}")
-            return []
+            return
 
         # 计算截图时间点
         positions = self.calculate_screenshot_positions(video_info["duration"])
         if not positions:
             logger.error(f"无法计算截图时间点: {video_path}")
-            return []
-
-        screenshot_paths = []
-        video_name = video_path.stem
+            return
 
         for i, time_pos in enumerate(positions):
             try:
@@ -164,54 +190,164 @@ class VideoProcessor:
                     logger.warning(f"无法提取帧 {video_path} @ {time_pos}s")
                     continue
 
-                # 生成截图路径
-                screenshot_path = self.temp_dir / f"{video_name}_frame_{i+1}.jpg"
-
-                # 保存截图
-                if ImageUtils.save_screenshot(frame, screenshot_path):
-                    screenshot_paths.append(str(screenshot_path))
-                    logger.debug(f"保存截图: {screenshot_path}")
-                else:
-                    logger.warning(f"保存截图失败: {screenshot_path}")
+                yield i, frame
 
             except Exception as e:
                 logger.error(f"处理截图失败 {video_path} @ {time_pos}s: {e}")
 
-        logger.info(f"从 {video_path.name} 提取了 {len(screenshot_paths)} 张截图")
+    def _iter_frames_av(self, video_path: Path) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        使用PyAV提取截图帧：容器只打开一次，
+        每个时间点跳转到之前的关键帧，再解码到目标时间
+        """
+        try:
+            container = av.open(str(video_path))
+        except Exception as e:
+            logger.error(f"无法获取视频信息: {video_path}: {e}")
+            return
+
+        try:
+            if not container.streams.video:
+                logger.error(f"无法获取视频信息: {video_path}")
+                return
+            stream = container.streams.video[0]
+
+            # 计算截图时间点
+            if stream.duration and stream.time_base:
+                duration = float(stream.duration * stream.time_base)
+            else:
+                duration = (container.duration or 0) / av.time_base
+
+            positions = self.calculate_screenshot_positions(duration)
+            if not positions:
+                logger.error(f"无法计算截图时间点: {video_path}")
+                return
+
+            for i, time_pos in enumerate(positions):
+                try:
+                    frame = self._decode_frame_at(container, stream, time_pos)
+                    if frame is None:
+                        logger.warning(f"无法提取帧 {video_path} @ {time_pos}s")
+                        continue
+
+                    yield i, ImageUtils.preprocess_frame(frame)
+
+                except Exception as e:
+                    logger.error(f"处理截图失败 {video_path} @ {time_pos}s: {e}")
+        finally:
+            container.close()
+
+    @staticmethod
+    def _decode_frame_at(container, stream, time_seconds: float) -> Optional[np.ndarray]:
+        """
+        跳转到指定时间点之前的关键帧，解码到目标时间并返回BGR帧
+        """
+        container.seek(int(time_seconds * av.time_base), backward=True, any_frame=False)
+
+        frame = None
+        for frame in container.decode(stream):
+            if frame.time is None or frame.time >= time_seconds:
+                break
+
+        return frame.to_ndarray(format='bgr24') if frame is not None else None
+
+    def _extract_frames(self, video_path: Path) -> List[Tuple[int, np.ndarray]]:
+        """
+        在计算出的截图时间点提取预处理后的视频帧
+        返回 (序号, 帧) 列表
+        """
+        return list(self._iter_frames(video_path))
+
+    def extract_key_frames(self, video_path: Path) -> List[str]:
+        """
+        提取视频关键帧并保存为图片
+        返回截图文件路径列表
+        """
+        screenshot_paths = []
+        video_name = video_path.stem
+
+        for i, frame in self._extract_frames(video_path):
+            # 生成截图路径
+            screenshot_path = self.temp_dir / f"{video_name}_frame_{i+1}.jpg"
+
+            # 保存截图
+            if ImageUtils.save_screenshot(frame, screenshot_path):
+                screenshot_paths.append(str(screenshot_path))
+                logger.debug("保存截图: %s", screenshot_path)
+            else:
+                logger.warning(f"保存截图失败: {screenshot_path}")
+
+        logger.debug("从 %s 提取了 %d 张截图", video_path.name, len(screenshot_paths))
         return screenshot_paths
 
+    async def stream_key_frames(self, video_path: Path) -> AsyncIterator[bytes]:
+        """
+        异步逐帧提取关键帧，每解码一帧即产出其JPEG字节
+        解码在线程中执行，不阻塞事件循环
+        """
+        frames = self._iter_frames(video_path)
+        pending = None
+        try:
+            while True:
+                # shield使取消只中断等待，不会丢失仍在线程中运行的解码
+                pending = asyncio.ensure_future(asyncio.to_thread(self._next_jpeg, video_path, frames))
+                jpeg_data = await asyncio.shield(pending)
+                pending = None
+                if jpeg_data is None:
+                    break
+                yield jpeg_data
+        finally:
+            # 线程仍在推进生成器时不能关闭它，先等待本帧解码结束
+            if pending is not None:
+                await asyncio.wait([pending])
+            frames.close()
+
+    @staticmethod
+    def _next_jpeg(video_path: Path, frames: Iterator[Tuple[int, np.ndarray]]) -> Optional[bytes]:
+        """
+        从帧迭代器取下一帧并编码为JPEG字节，帧耗尽时返回None
+        """
+        for i, frame in frames:
+            jpeg_data = ImageUtils.encode_screenshot(frame)
+            if jpeg_data:
+                return jpeg_data
+            logger.warning(f"编码截图失败: {video_path.name} #{i+1}")
+        return None
+
     def extract_best_frame(self, video_path: Path) -> Optional[str]:
         """
         提取最佳质量的单个帧
+        在内存中为各帧评分，只保存评分最高的一帧
         """
         # 提取多个帧
-        frame_paths = self.extract_key_frames(video_path)
-        if not frame_paths:
+        frames = self._extract_frames(video_path)
+        if not frames:
             return None
 
         # 计算每个帧的质量评分
-        best_frame = None
+        best_index, best_frame = None, None
         best_score = 0
 
-        for frame_path in frame_paths:
+        for i, frame in frames:
             try:
-                quality_score = ImageUtils.calculate_image_quality(frame_path)
+                quality_score = ImageUtils.calculate_image_quality(frame)
                 if quality_score > best_score:
                     best_score = quality_score
-                    best_frame = frame_path
+                    best_index, best_frame = i, frame
             except Exception as e:
-                logger.warning(f"计算图片质量失败 {frame_path}: {e}")
+                logger.warning(f"计算图片质量失败 {video_path.name} #{i+1}: {e}")
 
-        # 清理其他帧
-        for frame_path in frame_paths:
-            if frame_path != best_frame:
-                try:
-                    os.remove(frame_path)
-                except Exception as e:
-                    logger.warning(f"清理临时文件失败 {frame_path}: {e}")
+        if best_frame is None:
+            return None
+
+        # 只保存最佳帧
+        best_path = self.temp_dir / f"{video_path.stem}_frame_{best_index+1}.jpg"
+        if not ImageUtils.save_screenshot(best_frame, best_path):
+            logger.warning(f"保存截图失败: {best_path}")
+            return None
 
-        logger.info(f"选择最佳帧: {best_frame} (评分: {best_score:.1f})")
-        return best_frame
+        logger.info(f"选择最佳帧: {best_path} (评分: {best_score:.1f})")
+        return str(best_path)
 
     def cleanup_temp_files(self, video_path: Path = None):
         """
@@ -226,7 +362,7 @@ class VideoProcessor:
                 for temp_file in self.temp_dir.glob(pattern):
                     try:
                         temp_file.unlink()
-                        logger.debug(f"清理临时文件: {temp_file}")
+                        logger.debug("清理临时文件: %s", temp_file)
                     except Exception as e:
                         logger.warning(f"清理临时文件失败 {temp_file}: {e}")
             else:
@@ -238,7 +374,7 @@ class VideoProcessor:
                         file_age = time.time() - temp_file.stat().st_mtime
                         if file_age > 3600:  # 1小时
                             temp_file.unlink()
-                            logger.debug(f"清理过期临时文件: {temp_file}")
+                            logger.debug("清理过期临时文件: %s", temp_file)
                     except Exception as e:
                         logger.warning(f"清理临时文件失败 {temp_file}: {e}")
 
@@ -258,19 +394,31 @@ class VideoProcessor:
             "errors": []
         }
 
-        for video_path in video_paths:
-            try:
-                screenshots = self.extract_key_frames(video_path)
-                if screenshots:
-                    results["success"] += 1
-                    results["screenshots_extracted"] += len(screenshots)
-                else:
-                    results["failed"] += 1
-                    results["errors"].append(f"无法提取截图: {video_path.name}")
+        if not video_paths:
+            return results
 
-            except Exception as e:
-                results["failed"] += 1
-                results["errors"].append(f"处理失败 {video_path.name}: {e}")
+        # 各视频解码相互独立，分发到多个进程并行处理
+        max_workers = min(len(video_paths), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.extract_key_frames, video_path): video_path
+                for video_path in video_paths
+            }
+
+            for future in as_completed(futures):
+                video_path = futures[future]
+                try:
+                    screenshots = future.result()
+                    if screenshots:
+                        results["success"] += 1
+                        results["screenshots_extracted"] += len(screenshots)
+                    else:
+                        results["failed"] += 1
+                        results["errors"].append(f"无法提取截图: {video_path.name}")
+
+                except Exception as e:
+                    results["failed"] += 1
+                    results["errors"].append(f"处理失败 {video_path.name}: {e}")
 
         logger.info(f"批量处理完成: {results}")
         return results
\ No newline at end of file
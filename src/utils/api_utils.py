@@ -4,36 +4,63 @@ API调用工具函数模块
 """
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+import random
+import re
+from typing import Optional, Dict, Any, List, Tuple, Union
 import httpx
 from ..config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# 无效文件名建议：首尾不是字母、数字或中文，或包含文件名不允许的字符
+_INVALID_NAME_RE = re.compile(r'^[^a-zA-Z0-9\u4e00-\u9fa5]|[^a-zA-Z0-9\u4e00-\u9fa5]$|[<>:"/\\|?*]')
+
 class APIUtils:
     """API工具类"""
 
+    @staticmethod
+    def build_client(timeout: float = 30.0) -> httpx.AsyncClient:
+        """
+        创建共享的HTTP客户端
+        启用HTTP/2多路复用并保持连接，所有请求复用同一连接池
+        """
+        return httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            timeout=httpx.Timeout(timeout)
+        )
+
     @staticmethod
     async def call_api_with_retry(
         client: httpx.AsyncClient,
         endpoint: str,
         payload: Dict[str, Any],
         max_retries: int = None,
-        timeout: int = 30
+        timeout: int = 30,
+        files: Optional[Dict[str, Any]] = None
     ) -> Optional[str]:
         """
         带重试机制的API调用
+        提供files时以multipart表单发送，payload作为表单字段
         """
         if max_retries is None:
             max_retries = settings.max_retries
 
         for attempt in range(max_retries + 1):
             try:
-                response = await client.post(
-                    endpoint,
-                    json=payload,
-                    timeout=timeout
-                )
+                if files:
+                    response = await client.post(
+                        endpoint,
+                        data=payload,
+                        files=files,
+                        timeout=timeout
+                    )
+                else:
+                    response = await client.post(
+                        endpoint,
+                        json=payload,
+                        timeout=timeout
+                    )
 
                 if response.status_code == 200:
                     result = response.json()
@@ -50,7 +77,7 @@ class APIUtils:
 
             # 如果不是最后一次尝试，等待一段时间
             if attempt < max_retries:
-                wait_time = min(2 ** attempt, 10)  # 指数退避，最大等待10秒
+                wait_time = random.uniform(0, min(2 ** attempt, 10))  # 带随机抖动的指数退避，最大等待10秒
                 await asyncio.sleep(wait_time)
 
         logger.error(f"API调用失败，已达到最大重试次数 {max_retries}")
@@ -58,12 +85,16 @@ class APIUtils:
 
     @staticmethod
     def create_image_analysis_payload(
-        image_base64: str,
+        image_base64: Union[str, List[str]],
         prompt: str = None
     ) -> Dict[str, Any]:
         """
         创建图片分析的API负载
+        传入多张图片时，image_data 为base64字符串列表，一次请求完成分析
         """
+        if not isinstance(image_base64, str) and len(image_base64) == 1:
+            image_base64 = image_base64[0]
+
         if prompt is None:
             prompt = settings.analysis_prompt
 
@@ -73,6 +104,29 @@ class APIUtils:
             "model": "gemini-2.5-flash"
         }
 
+    @staticmethod
+    def create_multipart_payload(
+        images_data: List[bytes],
+        prompt: str = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        创建multipart格式的API负载，图片以原始字节上传，无需base64编码
+        返回 (表单字段, 文件字段)
+        """
+        if prompt is None:
+            prompt = settings.analysis_prompt
+
+        data = {
+            "prompt": prompt,
+            "model": "gemini-2.5-flash"
+        }
+        files = {
+            f"image_{i}": (f"image_{i}.jpg", image_data, "image/jpeg")
+            for i, image_data in enumerate(images_data)
+        }
+
+        return data, files
+
     @staticmethod
     async def test_api_connection(
         client: httpx.AsyncClient,
@@ -120,15 +174,7 @@ class APIUtils:
             return None
 
         # 检查是否包含敏感词汇或无效内容
-        invalid_patterns = [
-            r'^[^a-zA-Z0-9\u4e00-\u9fa5]',
-            r'[^a-zA-Z0-9\u4e00-\u9fa5]$',
-            r'[<>:"/\\|?*]',  # 文件名不允许的字符
-        ]
-
-        for pattern in invalid_patterns:
-            import re
-            if re.search(pattern, cleaned):
-                return None
+        if _INVALID_NAME_RE.search(cleaned):
+            return None
 
         return cleaned if cleaned else None
\ No newline at end of file
@@ -5,8 +5,18 @@
 import os
 import re
 from pathlib import Path
-from typing import Optional
-from ..config.settings import settings
+from typing import Optional, Set
+from ..config.settings import settings, VIDEO_EXT_SET
+
+# 常见的数字后缀模式：_1, (1), -1, 空格1（含全角数字和全角空格）
+_SUFFIX_RE = re.compile(r'(?:_\d+|\(\d+\)|-\d+|\s\d+)$')
+
+# 纯十六进制字符串，用于乱码文件名判断（同时匹配大小写，无需先转小写）
+_HEX_STEM_RE = re.compile(r'[a-fA-F0-9]+')
+
+# 文件名中不允许的字符：保留中文、字母、数字、下划线、横线、空格和全角括号
+_UNSAFE_CHARS_RE = re.compile(r'[^\w\- （）【】]')
+_WHITESPACE_RE = re.compile(r'\s+')
 
 class FilenameUtils:
     """文件名工具类"""
@@ -17,37 +27,40 @@ class FilenameUtils:
         判断是否为乱码文件名
         识别标准：长串十六进制字符组成
         """
-        # 移除扩展名
-        name_part = os.path.splitext(filename)[0]
+        # 定位扩展名，不创建去掉扩展名的新字符串
+        dot = filename.rfind('.')
+        stem_len = dot if dot > 0 else len(filename)
 
         # 检查长度
-        if len(name_part) < 8:
+        if stem_len < 8:
             return False
 
-        # 检查是否为纯十六进制字符
-        hex_pattern = r'^[a-f0-9]+$'
-        return bool(re.match(hex_pattern, name_part.lower()))
+        # 检查扩展名之前是否为纯十六进制字符
+        return _HEX_STEM_RE.fullmatch(filename, 0, stem_len) is not None
+
+    @staticmethod
+    def extract_base_name(filename: str) -> str:
+        """
+        提取基础文件名（移除扩展名和数字后缀）
+        例如：file_1.mp4 -> file, file(1).mp4 -> file
+        """
+        return _SUFFIX_RE.sub('', os.path.splitext(filename)[0])
 
     @staticmethod
     def is_video_file(filepath: Path) -> bool:
         """检查是否为视频文件"""
-        return filepath.suffix.lower() in settings.video_extensions
+        return filepath.suffix.lower() in VIDEO_EXT_SET
 
     @staticmethod
     def clean_filename(filename: str) -> str:
         """
         清理文件名，移除不允许的字符
         """
-        # 移除不允许的字符，保留中文、字母、数字、下划线、横线、空格
-        safe_chars = []
-        for char in filename:
-            if char.isalnum() or char in ['-', '_', ' ', '（）', '【】']:
-                safe_chars.append(char)
-
-        safe_name = ''.join(safe_chars).strip()
+        # 移除不允许的字符，保留中文、字母、数字、下划线、横线、空格和全角括号
+        safe_name = _UNSAFE_CHARS_RE.sub('', filename).strip()
 
         # 移除连续的空格
-        safe_name = re.sub(r'\s+', ' ', safe_name)
+        safe_name = _WHITESPACE_RE.sub(' ', safe_name)
 
         # 控制长度
         if len(safe_name) > settings.max_filename_length:
@@ -56,24 +69,35 @@ class FilenameUtils:
         return safe_name
 
     @staticmethod
-    def resolve_filename_conflict(filepath: Path) -> Path:
+    def resolve_filename_conflict(filepath: Path, reserved: Optional[Set[Path]] = None, *, reserve: bool = False) -> Path:
         """
         解决文件名冲突
-        如果文件已存在，添加数字后缀
+        如果文件已存在（或已被预留），添加数字后缀
+        reserve: 以O_EXCL原子创建空占位文件来占用路径，调用方随后将文件替换到该路径
         """
-        if not filepath.exists():
-            return filepath
-
+        reserved = reserved or set()
         base, ext = filepath.stem, filepath.suffix
         counter = 1
 
-        while filepath.exists():
+        while True:
+            if filepath not in reserved:
+                if not reserve:
+                    if not filepath.exists():
+                        return filepath
+                else:
+                    # 创建成功即表示路径可用，无需先检查是否存在
+                    try:
+                        fd = os.open(filepath, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+                    except FileExistsError:
+                        pass
+                    else:
+                        os.close(fd)
+                        return filepath
+
             new_name = f"{base}_{counter}{ext}"
             filepath = filepath.parent / new_name
             counter += 1
 
-        return filepath
-
     @staticmethod
     def generate_safe_name(ai_suggestion: str, original_ext: str) -> str:
         """
@@ -104,7 +128,7 @@ class FilenameUtils:
         cleaned = ai_response.strip().strip('"\'').strip()
 
         # 检查是否包含文件扩展名
-        if not any(cleaned.lower().endswith(ext) for ext in settings.video_extensions):
+        if os.path.splitext(cleaned)[1].lower() not in VIDEO_EXT_SET:
             # 如果没有扩展名，添加默认的.mp4
             cleaned += ".mp4"
 
@@ -3,11 +3,11 @@
 提供图片编码、预处理和保存功能
 """
 import base64
-import io
+import mmap
+import os
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 import numpy as np
-from PIL import Image
 import cv2
 
 class ImageUtils:
@@ -40,32 +40,37 @@ class ImageUtils:
         """
         try:
             with open(image_path, 'rb') as image_file:
-                image_data = image_file.read()
-                return base64.b64encode(image_data).decode('utf-8')
+                # 空文件无法映射
+                if os.fstat(image_file.fileno()).st_size == 0:
+                    return ""
+
+                # 内存映射直接编码，避免先读取出完整副本
+                with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as image_data:
+                    return base64.b64encode(image_data).decode('ascii')
         except Exception as e:
             raise Exception(f"图片编码失败: {e}")
 
+    @staticmethod
+    def encode_bytes_to_base64(image_data: bytes) -> str:
+        """
+        将已读取的图片字节编码为base64字符串
+        """
+        return base64.b64encode(image_data).decode('utf-8')
+
     @staticmethod
     def encode_array_to_base64(image_array: np.ndarray, format: str = 'JPEG') -> str:
         """
-        将numpy数组编码为base64字符串
+        将numpy数组（OpenCV BGR格式）编码为base64字符串
         """
         try:
-            # 转换为PIL Image
-            if len(image_array.shape) == 3:
-                # OpenCV使用BGR，需要转换为RGB
-                image_rgb = cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(image_rgb)
-            else:
-                pil_image = Image.fromarray(image_array)
-
-            # 保存到字节流
-            buffer = io.BytesIO()
-            pil_image.save(buffer, format=format, quality=85)
-            image_bytes = buffer.getvalue()
+            # 直接由OpenCV编码到内存缓冲区
+            params = [int(cv2.IMWRITE_JPEG_QUALITY), 85] if format.upper() in ('JPEG', 'JPG') else []
+            success, buffer = cv2.imencode(f'.{format.lower()}', image_array, params)
+            if not success:
+                raise ValueError(f"不支持的图片格式: {format}")
 
             # 编码为base64
-            return base64.b64encode(image_bytes).decode('utf-8')
+            return base64.b64encode(buffer).decode('ascii')
         except Exception as e:
             raise Exception(f"图片数组编码失败: {e}")
 
@@ -85,11 +90,28 @@ class ImageUtils:
             print(f"保存截图失败 {output_path}: {e}")
             return False
 
+    @staticmethod
+    def encode_screenshot(frame: np.ndarray) -> Optional[bytes]:
+        """
+        将视频帧截图编码为内存中的JPEG字节
+        """
+        try:
+            # 调整大小
+            resized_frame = ImageUtils.resize_image(frame)
+
+            # 编码图片
+            success, buffer = cv2.imencode('.jpg', resized_frame)
+            return buffer.tobytes() if success else None
+        except Exception as e:
+            print(f"编码截图失败: {e}")
+            return None
+
     @staticmethod
     def preprocess_frame(frame: np.ndarray) -> np.ndarray:
         """
         预处理视频帧
         包括亮度调整、对比度增强等
+        结果直接写回输入帧缓冲区，调用方传入的帧会被修改
         """
         try:
             # 转换为YUV颜色空间
@@ -98,40 +120,41 @@ class ImageUtils:
             # 增强亮度和对比度
             yuv[:,:,0] = cv2.equalizeHist(yuv[:,:,0])
 
-            # 转换回BGR
-            enhanced = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR)
+            # 转换回BGR，复用输入帧缓冲区
+            enhanced = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR, dst=frame)
 
-            # 轻微锐化
-            kernel = np.array([[-1,-1,-1],
-                             [-1, 9,-1],
-                             [-1,-1,-1]])
-            sharpened = cv2.filter2D(enhanced, -1, kernel)
-
-            return sharpened
+            # 轻微锐化（反锐化掩模，原地写回）
+            blurred = cv2.GaussianBlur(enhanced, (0, 0), 1.0)
+            return cv2.addWeighted(enhanced, 2.0, blurred, -1.0, 0, dst=enhanced)
         except Exception:
             # 预处理失败，返回原图
             return frame
 
     @staticmethod
-    def calculate_image_quality(image_path: Union[str, Path]) -> float:
+    def calculate_image_quality(image: Union[str, Path, np.ndarray]) -> float:
         """
         计算图片质量评分 (0-100)
         基于清晰度、亮度、对比度等因素
+        image 可以是图片路径或BGR帧数组，评分在四分之一分辨率上计算
         """
         try:
-            image = cv2.imread(str(image_path))
+            if not isinstance(image, np.ndarray):
+                image = cv2.imread(str(image))
             if image is None:
                 return 0.0
 
+            # 区域插值降采样后转灰度（带抗混叠，评分只用于排序，无需逐像素精确）
+            small = cv2.resize(image, (0, 0), fx=0.25, fy=0.25, interpolation=cv2.INTER_AREA)
+            sampled = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
             # 计算清晰度（使用拉普拉斯算子）
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+            sharpness = cv2.Laplacian(sampled, cv2.CV_32F).var()
 
             # 计算亮度
-            brightness = np.mean(gray)
+            brightness = np.mean(sampled)
 
             # 计算对比度
-            contrast = np.std(gray)
+            contrast = np.std(sampled)
 
             # 综合评分（可根据实际需求调整权重）
             quality_score = (
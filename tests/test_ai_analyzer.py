@@ -0,0 +1,107 @@
+"""
+AI分析模块测试
+"""
+import asyncio
+import json
+from pathlib import Path
+import httpx
+from src.core import ai_analyzer
+from src.core.ai_analyzer import AIAnalyzer
+from src.core.ai_cache import AICache
+from src.config.settings import settings
+
+def _make_analyzer(tmp_path: Path, handler) -> AIAnalyzer:
+    """创建使用模拟传输层和临时缓存的分析器（需在事件循环中调用）"""
+    analyzer = AIAnalyzer(api_url="http://proxy.test/", cache=AICache(str(tmp_path / "cache.sqlite3")))
+    analyzer._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return analyzer
+
+class TestAIAnalyzer:
+    """AI分析器测试"""
+
+    def test_multipart_upload(self, tmp_path, monkeypatch):
+        """测试multipart上传格式发送原始截图字节"""
+        monkeypatch.setattr(settings, "api_upload_format", "multipart")
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"response": "浴室剧情"})
+
+        async def run():
+            analyzer = _make_analyzer(tmp_path, handler)
+            try:
+                return await analyzer.analyze_video_screenshots(Path("a.mp4"), [b"jpeg-a", b"jpeg-b"])
+            finally:
+                await analyzer.aclose()
+
+        assert asyncio.run(run()) == "浴室剧情.mp4"
+        assert len(requests) == 1
+        assert requests[0].headers["content-type"].startswith("multipart/form-data")
+        assert b"jpeg-a" in requests[0].content and b"jpeg-b" in requests[0].content
+
+    def test_json_batch_request(self, tmp_path):
+        """测试多张截图以代理约定的JSON格式一次发送"""
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return httpx.Response(200, json={"response": "美腿自拍"})
+
+        async def run():
+            analyzer = _make_analyzer(tmp_path, handler)
+            try:
+                return await analyzer.analyze_video_screenshots(Path("a.mp4"), [b"a", b"b", b"c"])
+            finally:
+                await analyzer.aclose()
+
+        assert asyncio.run(run()) == "美腿自拍.mp4"
+        assert len(requests) == 1
+        assert set(requests[0]) == {"prompt", "image_data", "model"}
+        assert requests[0]["image_data"] == ["YQ==", "Yg==", "Yw=="]
+
+    def test_probe_ttl_and_persistence(self, tmp_path, monkeypatch):
+        """测试API探测成功后在有效期内跳过，并跨实例复用"""
+        monkeypatch.setattr(ai_analyzer, "_PROBE_CACHE_FILE", tmp_path / "probe.ts")
+        probes = []
+
+        def handler(request):
+            probes.append(request)
+            return httpx.Response(200, json={"response": "连接正常"})
+
+        async def probe(api_url="http://proxy.test/", expired=False):
+            analyzer = _make_analyzer(tmp_path, handler)
+            analyzer.api_url = api_url
+            analyzer._last_probe_ok_at = analyzer._load_probe_timestamp()
+            if expired:
+                analyzer._last_probe_ok_at -= ai_analyzer._PROBE_TTL_SECONDS + 1
+            try:
+                return await analyzer.test_api_connection()
+            finally:
+                await analyzer.aclose()
+
+        assert asyncio.run(probe())
+        assert len(probes) == 1
+
+        # 新实例读取持久化的探测时间，有效期内不再探测
+        assert asyncio.run(probe())
+        assert len(probes) == 1
+
+        # 过期或API地址变化时重新探测
+        assert asyncio.run(probe(expired=True))
+        assert asyncio.run(probe(api_url="http://other.test/"))
+        assert len(probes) == 3
+
+    def test_probe_failure_not_persisted(self, tmp_path, monkeypatch):
+        """测试探测失败时不记录时间"""
+        monkeypatch.setattr(ai_analyzer, "_PROBE_CACHE_FILE", tmp_path / "probe.ts")
+
+        async def probe():
+            analyzer = _make_analyzer(tmp_path, lambda request: httpx.Response(503))
+            try:
+                return await analyzer.test_api_connection()
+            finally:
+                await analyzer.aclose()
+
+        assert not asyncio.run(probe())
+        assert not (tmp_path / "probe.ts").exists()
@@ -0,0 +1,33 @@
+"""
+AI分析缓存测试
+"""
+import tempfile
+from pathlib import Path
+from src.core.ai_cache import AICache
+
+class TestAICache:
+    """AI分析缓存测试"""
+
+    def test_set_and_get(self):
+        """测试缓存读写"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AICache(str(Path(temp_dir) / "cache.sqlite3"))
+            key = AICache.image_key(b"fake image bytes")
+
+            assert cache.get(key) is None
+            cache.set(key, "浴室剧情.mp4")
+            assert cache.get(key) == "浴室剧情.mp4"
+            cache.close()
+
+    def test_expired_entry(self):
+        """测试过期缓存不返回"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AICache(str(Path(temp_dir) / "cache.sqlite3"), ttl=-1)
+            cache.set("key", "美腿自拍.mp4")
+            assert cache.get("key") is None
+            cache.close()
+
+    def test_video_key_ignores_order(self):
+        """测试视频级缓存键与截图顺序无关"""
+        keys = [AICache.image_key(b"a"), AICache.image_key(b"b")]
+        assert AICache.video_key(keys) == AICache.video_key(reversed(keys))
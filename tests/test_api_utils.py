@@ -0,0 +1,124 @@
+"""
+API工具模块测试
+"""
+import asyncio
+import re
+import httpx
+from src.utils import api_utils
+from src.utils.api_utils import APIUtils
+
+class TestAPIUtils:
+    """API工具测试"""
+
+    def test_single_image_payload(self):
+        """测试单图负载保持代理约定的格式"""
+        payload = APIUtils.create_image_analysis_payload("aGVsbG8=", prompt="测试")
+        assert payload == {"prompt": "测试", "image_data": "aGVsbG8=", "model": "gemini-2.5-flash"}
+
+        # 只有一张图片的列表与单张图片相同
+        assert APIUtils.create_image_analysis_payload(["aGVsbG8="], prompt="测试") == payload
+
+    def test_multi_image_payload(self):
+        """测试多图负载在同一格式中以列表传递图片"""
+        payload = APIUtils.create_image_analysis_payload(["YQ==", "Yg==", "Yw=="], prompt="测试")
+        assert set(payload) == {"prompt", "image_data", "model"}
+        assert payload["image_data"] == ["YQ==", "Yg==", "Yw=="]
+
+    def test_multipart_payload(self):
+        """测试multipart负载以原始字节上传图片"""
+        data, files = APIUtils.create_multipart_payload([b"jpeg-a", b"jpeg-b"], prompt="测试")
+
+        assert data == {"prompt": "测试", "model": "gemini-2.5-flash"}
+        assert files == {
+            "image_0": ("image_0.jpg", b"jpeg-a", "image/jpeg"),
+            "image_1": ("image_1.jpg", b"jpeg-b", "image/jpeg"),
+        }
+
+    def test_call_api_with_files(self):
+        """测试提供files时以multipart表单发送"""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"response": " 浴室剧情 "})
+
+        async def call():
+            data, files = APIUtils.create_multipart_payload([b"jpeg-a"], prompt="测试")
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await APIUtils.call_api_with_retry(client, "http://proxy.test/", data, files=files)
+
+        assert asyncio.run(call()) == "浴室剧情"
+        assert len(requests) == 1
+        assert requests[0].headers["content-type"].startswith("multipart/form-data")
+        assert b'name="prompt"' in requests[0].content
+        assert b"jpeg-a" in requests[0].content
+
+    def test_build_client(self):
+        """测试共享客户端的超时配置"""
+        async def build():
+            client = APIUtils.build_client(12.5)
+            try:
+                return client.timeout
+            finally:
+                await client.aclose()
+
+        assert asyncio.run(build()) == httpx.Timeout(12.5)
+
+    def test_retry_with_jittered_backoff(self, monkeypatch):
+        """测试失败重试使用带随机抖动的指数退避"""
+        requests = []
+        bounds = []
+        sleeps = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(500, text="error")
+
+        def fake_uniform(low, high):
+            bounds.append((low, high))
+            return high / 2
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+
+        monkeypatch.setattr(api_utils.random, "uniform", fake_uniform)
+        monkeypatch.setattr(api_utils.asyncio, "sleep", fake_sleep)
+
+        async def call():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await APIUtils.call_api_with_retry(client, "http://proxy.test/", {}, max_retries=5)
+
+        assert asyncio.run(call()) is None
+        assert len(requests) == 6
+        assert bounds == [(0, 1), (0, 2), (0, 4), (0, 8), (0, 10)]
+        assert sleeps == [0.5, 1, 2, 4, 5]
+
+    def test_parse_api_response(self):
+        """测试文件名建议的接受与拒绝"""
+        assert APIUtils.parse_api_response(' "浴室剧情" ') == "浴室剧情"
+        assert APIUtils.parse_api_response("Office Party 2") == "Office Party 2"
+        assert APIUtils.parse_api_response("") is None
+        assert APIUtils.parse_api_response("'  '") is None
+        assert APIUtils.parse_api_response("a" * 101) is None
+        assert APIUtils.parse_api_response("-开头") is None
+        assert APIUtils.parse_api_response("结尾.") is None
+        assert APIUtils.parse_api_response("a/b") is None
+        assert APIUtils.parse_api_response("a:b") is None
+
+    def test_invalid_name_regex_matches_old_patterns(self):
+        """测试合并后的正则与原先三条规则判定一致"""
+        old_patterns = [
+            r'^[^a-zA-Z0-9\u4e00-\u9fa5]',
+            r'[^a-zA-Z0-9\u4e00-\u9fa5]$',
+            r'[<>:"/\\|?*]',
+        ]
+        samples = [
+            "正常名称", "abc", "A1", "中文 English 123", "a b", "a-b_c",
+            "_abc", "abc_", " abc", "abc ", "(abc)", "【标题】", "标题。",
+            "a<b", "a>b", "a:b", 'a"b', "a/b", "a\\b", "a|b", "a?b", "a*b",
+            "?", "a", "中", "ａｂｃ", "日本語タイトル", "a.b", "a\tb", "é",
+        ]
+
+        for sample in samples:
+            expected = any(re.search(p, sample) for p in old_patterns)
+            assert bool(api_utils._INVALID_NAME_RE.search(sample)) == expected, sample
@@ -0,0 +1,98 @@
+"""
+文件重命名模块测试
+"""
+import os
+import tempfile
+from pathlib import Path
+from src.core.file_renamer import FileRenamer
+
+class TestFileRenamer:
+    """文件重命名器测试"""
+
+    def test_extract_base_name(self):
+        """测试基础文件名提取"""
+        renamer = FileRenamer(dry_run=True)
+        assert renamer._extract_base_name("video_1.mp4") == "video"
+        assert renamer._extract_base_name("video(2).mp4") == "video"
+        assert renamer._extract_base_name("video-3.mp4") == "video"
+        assert renamer._extract_base_name("video 4.mp4") == "video"
+        assert renamer._extract_base_name("video.mp4") == "video"
+        # 全角数字和全角空格同样视为数字后缀
+        assert renamer._extract_base_name("video_１２.mp4") == "video"
+        assert renamer._extract_base_name("video\u30001.mp4") == "video"
+
+    def test_cleanup_duplicate_files(self):
+        """测试重复文件检测保留最新文件"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for i, filename in enumerate(["浴室剧情.mp4", "浴室剧情_1.mp4", "浴室剧情(2).mp4", "美腿自拍.mp4"]):
+                file_path = Path(temp_dir) / filename
+                file_path.touch()
+                os.utime(file_path, (1000 + i, 1000 + i))
+
+            results = FileRenamer(dry_run=True).cleanup_duplicate_files(Path(temp_dir))
+
+            assert results["duplicate_groups"] == 1
+            assert results["total_duplicates"] == 3
+            assert results["files_to_keep"] == [str(Path(temp_dir) / "浴室剧情(2).mp4")]
+            assert len(results["files_to_remove"]) == 2
+
+    def test_batch_rename_files(self):
+        """测试批量重命名及缺失文件跳过"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original = Path(temp_dir) / "1a07ebd26e434b4222216a.mp4"
+            original.touch()
+            missing = Path(temp_dir) / "981b707c0722116fc3dcec8edc71e42e.mp4"
+
+            renamer = FileRenamer(log_file_path=str(Path(temp_dir) / "rename_log.jsonl"))
+            results = renamer.batch_rename_files({original: "浴室剧情", missing: "美腿自拍.mp4"})
+
+            assert results["success"] == 1
+            assert results["skipped"] == 1
+            assert not original.exists()
+            assert (Path(temp_dir) / "浴室剧情.mp4").exists()
+
+    def test_batch_rename_directory_fails(self):
+        """测试目录路径计为失败而非跳过"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory = Path(temp_dir) / "1a07ebd26e434b4222216a.mp4"
+            directory.mkdir()
+
+            renamer = FileRenamer(log_file_path=str(Path(temp_dir) / "rename_log.jsonl"))
+            results = renamer.batch_rename_files({directory: "浴室剧情.mp4"})
+
+            assert results["failed"] == 1
+            assert results["skipped"] == 0
+            assert directory.is_dir()
+
+    def test_rename_log_and_undo(self):
+        """测试重命名日志逐条写入并可撤销"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            original = Path(temp_dir) / "1a07ebd26e434b4222216a.mp4"
+            original.touch()
+            log_file_path = Path(temp_dir) / "rename_log.jsonl"
+
+            renamer = FileRenamer(log_file_path=str(log_file_path))
+            assert renamer.rename_single_file(original, "浴室剧情.mp4")
+            # 未调用save_rename_log前日志已写入文件
+            assert len(log_file_path.read_text(encoding="utf-8").splitlines()) == 1
+            assert renamer.save_rename_log()
+
+            assert len(log_file_path.read_text(encoding="utf-8").splitlines()) == 1
+            assert renamer.get_rename_statistics()["successful_operations"] == 1
+
+            assert renamer.undo_rename()
+            assert original.exists()
+
+    def test_batch_rename_same_target(self):
+        """测试多个文件重命名为同一名称时自动添加后缀"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            originals = [Path(temp_dir) / f"{i:032x}.mp4" for i in range(3)]
+            for original in originals:
+                original.touch()
+
+            renamer = FileRenamer(log_file_path=str(Path(temp_dir) / "rename_log.jsonl"))
+            results = renamer.batch_rename_files({original: "浴室剧情.mp4" for original in originals})
+
+            assert results["success"] == 3
+            for name in ["浴室剧情.mp4", "浴室剧情_1.mp4", "浴室剧情_2.mp4"]:
+                assert (Path(temp_dir) / name).exists()
@@ -4,7 +4,7 @@
 import pytest
 import tempfile
 from pathlib import Path
-from src.core.file_scanner import FileScanner
+from src.core.file_scanner import FileScanner, from_path_list
 from src.utils.filename_utils import FilenameUtils
 
 class TestFileScanner:
@@ -25,6 +25,24 @@ class TestFileScanner:
         assert FilenameUtils.is_video_file(Path("test.txt")) == False
         assert FilenameUtils.is_video_file(Path("test.jpg")) == False
 
+    def test_clean_filename(self):
+        """测试文件名清理"""
+        assert FilenameUtils.clean_filename("浴室/剧情:*?.") == "浴室剧情"
+        assert FilenameUtils.clean_filename("  美腿   自拍_01-a  ") == "美腿 自拍_01-a"
+        assert FilenameUtils.clean_filename("【合集】御姐（上）") == "【合集】御姐（上）"
+
+    def test_resolve_filename_conflict_reserve(self):
+        """测试冲突解决时原子占用目标路径"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = Path(temp_dir) / "浴室剧情.mp4"
+            target.touch()
+
+            first = FilenameUtils.resolve_filename_conflict(target, reserve=True)
+            second = FilenameUtils.resolve_filename_conflict(target, reserve=True)
+
+            assert first.name == "浴室剧情_1.mp4" and first.exists()
+            assert second.name == "浴室剧情_2.mp4" and second.exists()
+
     def test_scanner_initialization(self):
         """测试扫描器初始化"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -56,6 +74,34 @@ class TestFileScanner:
             assert any(f.name == "video2.avi" for f in files)
             assert any(f.name == "1a07ebd26e434b4222216a.mp4" for f in files)
 
+    def test_scan_nested_directory(self):
+        """测试递归与非递归扫描子目录"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sub_dir = Path(temp_dir) / "sub" / "deeper"
+            sub_dir.mkdir(parents=True)
+            (Path(temp_dir) / "top.mp4").touch()
+            (sub_dir / "nested.MKV").touch()
+            (sub_dir / "notes.txt").touch()
+            (sub_dir / "mp4").touch()
+
+            scanner = FileScanner(temp_dir)
+            assert sorted(f.name for f in scanner.scan_directory()) == ["nested.MKV", "top.mp4"]
+            assert [f.name for f in scanner.scan_directory(recursive=False)] == ["top.mp4"]
+
+    def test_scan_many_subdirectories(self):
+        """测试子目录较多时并行扫描结果完整"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            expected = []
+            for i in range(8):
+                sub_dir = Path(temp_dir) / f"dir{i}" / "inner"
+                sub_dir.mkdir(parents=True)
+                (sub_dir / f"video{i}.mp4").touch()
+                (sub_dir.parent / f"clip{i}.avi").touch()
+                expected += [f"video{i}.mp4", f"clip{i}.avi"]
+
+            files = FileScanner(temp_dir).scan_directory()
+            assert sorted(f.name for f in files) == sorted(expected)
+
     def test_find_garbled_files(self):
         """测试查找乱码文件"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -75,4 +121,52 @@ class TestFileScanner:
             # 应该找到2个乱码文件
             assert len(garbled_files) == 2
             assert any(f.name == "1a07ebd26e434b4222216a.mp4" for f in garbled_files)
-            assert any(f.name == "981b707c0722116fc3dcec8edc71e42e.mp4" for f in garbled_files)
\ No newline at end of file
+            assert any(f.name == "981b707c0722116fc3dcec8edc71e42e.mp4" for f in garbled_files)
+
+    def test_validate_files_and_summary(self):
+        """测试文件验证与扫描摘要"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            empty_file = Path(temp_dir) / "empty.mp4"
+            empty_file.touch()
+            video_file = Path(temp_dir) / "video.MP4"
+            video_file.write_bytes(b"0" * 1024)
+            missing_file = Path(temp_dir) / "missing.avi"
+
+            scanner = FileScanner(temp_dir)
+            assert scanner.validate_files([empty_file, video_file, missing_file]) == [video_file]
+
+            summary = scanner.get_scan_summary([empty_file, video_file, missing_file])
+            assert summary["total_files"] == 3
+            assert summary["extensions"] == {".mp4": 2}
+            assert summary["size_distribution"]["small"] == 2
+
+    def test_validate_files_after_filter(self):
+        """测试过滤后被删除或清空的文件在验证时被剔除"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            deleted_file = Path(temp_dir) / "deleted.mp4"
+            emptied_file = Path(temp_dir) / "emptied.mp4"
+            for file_path in (deleted_file, emptied_file):
+                file_path.write_bytes(b"0" * (2 * 1024 * 1024))
+
+            scanner = FileScanner(temp_dir)
+            records = scanner.filter_by_size(scanner.scan_records())
+            assert len(records) == 2
+
+            deleted_file.unlink()
+            emptied_file.write_bytes(b"")
+            assert scanner.validate_files(records) == []
+
+    def test_scan_records(self):
+        """测试扫描记录携带文件大小，可直接用于过滤"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            (Path(temp_dir) / "small.mp4").write_bytes(b"0" * 1024)
+            (Path(temp_dir) / "large.mp4").write_bytes(b"0" * (2 * 1024 * 1024))
+            (Path(temp_dir) / "readme.txt").touch()
+
+            scanner = FileScanner(temp_dir)
+            records = scanner.scan_records()
+            assert sorted(r.name for r in records) == ["large.mp4", "small.mp4"]
+            assert [r.name for r in scanner.filter_by_size(records)] == ["large.mp4"]
+
+            records = from_path_list([Path(temp_dir) / "small.mp4", Path(temp_dir) / "missing.mp4"])
+            assert len(records) == 1 and records[0].size == 1024
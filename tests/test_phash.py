@@ -0,0 +1,25 @@
+"""
+感知哈希模块测试
+"""
+import numpy as np
+from src.core.phash import frame_hash, group_by_hamming
+
+class TestPhash:
+    """感知哈希测试"""
+
+    def test_group_by_hamming(self):
+        """测试按汉明距离分组"""
+        hashes = [0b0000, 0b0011, 0xFFFF_FFFF_0000_0000, 0xFFFF_FFFF_0000_0001]
+        labels = group_by_hamming(hashes, threshold=4)
+
+        assert labels[0] == labels[1]
+        assert labels[2] == labels[3]
+        assert labels[0] != labels[2]
+
+    def test_frame_hash_is_stable_under_brightness(self):
+        """测试亮度变化不影响差值哈希"""
+        gradient = np.tile(np.arange(0, 256, 4, dtype=np.uint8), (48, 1))
+        frame = np.dstack([gradient] * 3)
+        brighter = np.clip(frame.astype(np.int16) + 20, 0, 255).astype(np.uint8)
+
+        assert frame_hash(frame) == frame_hash(brighter)
@@ -0,0 +1,46 @@
+"""
+视频处理模块测试
+"""
+import asyncio
+import threading
+import numpy as np
+from pathlib import Path
+from src.core.video_processor import VideoProcessor
+
+class TestVideoProcessor:
+    """视频处理器测试"""
+
+    def test_stream_key_frames_cancel(self, tmp_path, monkeypatch):
+        """测试解码中途取消时任务正常取消且帧生成器被关闭"""
+        decoding = threading.Event()
+        release = threading.Event()
+        closed = []
+
+        def slow_frames(video_path):
+            try:
+                decoding.set()
+                release.wait(5)
+                yield 0, np.zeros((8, 8, 3), dtype=np.uint8)
+            finally:
+                closed.append(True)
+
+        processor = VideoProcessor(temp_dir=str(tmp_path))
+        monkeypatch.setattr(processor, "_iter_frames", slow_frames)
+
+        async def consume():
+            return [data async for data in processor.stream_key_frames(Path("slow.mp4"))]
+
+        async def run():
+            task = asyncio.create_task(consume())
+            await asyncio.to_thread(decoding.wait, 5)
+            task.cancel()
+            release.set()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            return task
+
+        task = asyncio.run(run())
+        assert task.cancelled()
+        assert closed == [True]